@@ -1,28 +1,62 @@
 # backend/app/__init__.py
+import logging
+import os
+import time
+
 from flask import Flask
 from flask_cors import CORS
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
 def create_app():
+    """Build the one application used by `python run.py` and by the WSGI server (wsgi.py).
+
+    Heavy libraries and the database pool are left for the first request
+    that needs them; see app/startup.py for preloading and the import report.
+    """
+    started = time.perf_counter()
     app = Flask(__name__)
 
-    # app.config.from_pyfile('config.py', silent=True)  
+    # app.config.from_pyfile('config.py', silent=True)
+
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s",
+        )
 
     CORS(app)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+
+    @app.after_request
+    def expose_headers(resp):
+        resp.headers["Access-Control-Expose-Headers"] = "Content-Disposition, X-Join-Stats, X-Insert-Stats, X-Total-Count"
+        return resp
 
-    @app.route('/')
-    def index():
-        return 'Backend server is running'
+    upload_folder = os.path.join(BASE_DIR, "uploads", "templates")
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    os.makedirs(upload_folder, exist_ok=True)
+    # Let a fronting nginx/Apache send artifact files itself
+    app.config['USE_X_SENDFILE'] = os.getenv("USE_X_SENDFILE", "0") == "1"
 
     # Import and register blueprints
-    # from .routes.auth import bp as auth_bp
+    from .routes.auth import auth_bp
     from .routes.upload import bp as upload_bp
     # from .routes.preview import bp as preview_bp
     from .routes.generate import bp as generate_bp
+    from .routes.excel_generate import excel_bp
+    from .routes.jobs import jobs_bp
+    from .routes.api import api_bp
 
-    # app.register_blueprint(auth_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(generate_bp)
     app.register_blueprint(upload_bp)
     # app.register_blueprint(preview_bp)
-    app.register_blueprint(generate_bp)
-    
+    app.register_blueprint(excel_bp)
+    app.register_blueprint(jobs_bp)
+    # Registered last: where a path is served twice the blueprints above win
+    app.register_blueprint(api_bp)
 
+    app.logger.debug(f"App created in {(time.perf_counter() - started) * 1000:.0f} ms")
     return app
@@ -0,0 +1,1158 @@
+# backend/app/routes/api.py
+from flask import Blueprint, current_app, request, jsonify, send_file
+from datetime import datetime, timedelta
+
+from app.routes.jobs import job_accepted, wants_async
+from app.services import db, generation, migrations
+from app.services.artifact_cache import grades_cache
+from app.services.bulk_insert import bulk_delete, bulk_insert, bulk_update
+from app.services.catalog import catalog, page_args
+from app.services.generation import GenerationError
+from app.services.history import history
+from app.services.jobs import DONE, jobs
+from app.services.storage import send_artifact, storage
+
+import base64
+import logging
+import os
+import json, traceback
+
+api_bp = Blueprint('api', __name__)
+
+# Job bodies run on worker threads outside any app context
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads", "templates")
+GENERATED_FOLDER = storage.root
+
+DEFAULT_MAPPING = {}
+
+# Database connection function
+def get_db_connection():
+    """Check out a connection from the shared pool; close() returns it"""
+    try:
+        return db.get_connection()
+    except db.Error as e:
+        logger.error(f"Database connection error: {str(e)}")
+        raise
+
+def to_number(val):
+    """Convert to int/float if numeric, else return original or None."""
+    try:
+        if val is None or str(val).strip() == "":
+            return None
+        num = float(val)
+        return int(num) if num.is_integer() else num
+    except (ValueError, TypeError):
+        return val
+
+# Quick ping
+@api_bp.route("/api/ping")
+def ping():
+    return jsonify(ok=True)
+
+# Connection pool metrics: checkouts, exhaustion/timeouts and wait latency
+@api_bp.route("/api/db/pool")
+def db_pool_stats():
+    return jsonify(db.pool.stats())
+
+@api_bp.route("/")
+def home():
+    return "Hello, Creo Certificate Backend!"
+
+@api_bp.route('/generate/certificates', methods=['POST'])
+def generate_certificates():
+    data = request.json
+    template_path = data.get("templatePath")
+
+    # Get custom filename from request, or fallback
+    custom_filename = data.get("filename")
+    if custom_filename:
+        filename = f"{custom_filename}.pptx"
+    else:
+        name = data.get("name", "Certificate")
+        filename = f"{name.replace(' ', '_')}_Certificate.pptx"
+
+    # Load and customize the PPTX
+    from pptx import Presentation
+
+    prs = Presentation(template_path)
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                for paragraph in shape.text_frame.paragraphs:
+                    for run in paragraph.runs:
+                        if "{{" in run.text and "}}" in run.text:
+                            key = run.text.replace("{{", "").replace("}}", "").strip()
+                            run.text = data.get(key, "")
+
+    # Named by the caller, so a new render replaces the previous one
+    storage.put(filename, prs.save, overwrite=True)
+    catalog.touch(filename)
+
+    # Return list with one file
+    return jsonify({"files": [filename]})
+
+# ✅ Certificate generation route (runs the generator in-process and logs to history)
+@api_bp.route('/api/generate-certificates', methods=['POST'])
+def api_generate_certificates():
+    # 1. Run the certificate generator (or the remote worker, if configured)
+    try:
+        result = generation.generate("certificates", request.get_json())
+    except GenerationError as e:
+        current_app.logger.error(f"Certificate generation failed: {e}")
+        return jsonify({"error": "Failed to generate certificates"}), e.status
+
+    # 2. Get list of generated files
+    generated_files = result.get("files", [])
+
+    # 3. ✅ Track each generated file in download history
+    for fname in generated_files:
+        history.add({
+            "type": "certificate",
+            "filename": fname,
+            "url": f"/static/generated/{fname}"
+        })
+
+    # 4. Return the result to frontend
+    return jsonify({
+        "message": "Certificates generated",
+        "files": generated_files,
+        "unknown_placeholders": result.get("unknown_placeholders", []),
+    })
+
+# Listings of static/generated are served from the catalog index.
+# offset/limit or page/per_page paginate, type=a,b narrows the types and
+# X-Total-Count carries the number of matches.
+def _catalog_listing(types, render):
+    try:
+        offset, limit = page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    requested = request.args.get("type")
+    if requested:
+        types = [t for t in types if t in requested.split(",")]
+
+    items, total = catalog.query(types, offset, limit)
+    response = jsonify([render(a) for a in items])
+    response.headers["X-Total-Count"] = str(total)
+    return response
+
+@api_bp.route('/api/certificates', methods=['GET'])
+def get_certificates():
+    return _catalog_listing(["certificate"], lambda a: a.filename)
+
+
+@api_bp.route('/api/tesda', methods=['GET'])
+def get_tesda_records():
+    return _catalog_listing(["tesda", "excel"], lambda a: a.filename)
+
+
+@api_bp.route("/api/download-history", methods=["GET"])
+def get_download_history():
+    return _catalog_listing(["certificate", "tesda"], lambda a: a.to_dict())
+
+# The artifact URLs handed out above; Range requests are honoured so large
+# decks can be resumed or fetched in parts
+@api_bp.route("/static/generated/<path:filename>", methods=["GET"])
+def get_generated_artifact(filename):
+    try:
+        if not storage.exists(filename):
+            return jsonify({"error": "File not found"}), 404
+    except ValueError:
+        return jsonify({"error": "Invalid filename"}), 400
+    return send_artifact(filename, as_attachment=request.args.get("download", "1") != "0")
+
+# TESDA GENERATION ROUTE (internal)
+@api_bp.route('/generate/tesda', methods=['POST'])
+def generate_tesda_file():
+    try:
+        job_id = generation.submit_tesda(request.get_json())
+    except GenerationError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    if wants_async():
+        return job_accepted(job_id)
+
+    job = jobs.wait(job_id)
+    if job["status"] != DONE:
+        return jsonify({"error": job["error"]}), 500
+    return jsonify({"files": job["result"]["files"]}), 200
+
+
+# API ROUTE THAT RUNS THE GENERATOR AND TRACKS HISTORY
+# ✅ TESDA generation route (runs the generator in-process and logs to history)
+@api_bp.route('/api/generate-tesda', methods=['POST'])
+def api_generate_tesda():
+    # Run the TESDA generator in-process (or on the remote worker, if configured)
+    try:
+        result = generation.generate("tesda", request.get_json())
+    except GenerationError as e:
+        current_app.logger.error(f"TESDA generation failed: {e}")
+        return jsonify({"error": "Failed to generate TESDA file"}), e.status
+
+    result = {"files": result.get("files", [])}
+    generated_files = result.get("files", [])
+
+    for fname in generated_files:
+        if storage.exists(fname):  # ✅ Only add to history if file exists
+            history.add({
+                "type": "tesda",
+                "filename": fname,
+                "timestamp": datetime.fromtimestamp(storage.stat(fname)["mtime"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "url": f"/static/generated/{fname}"
+            })
+
+    return jsonify(result)
+
+
+# Recently generated/downloaded files as recorded by the routes, newest first
+@api_bp.route("/api/recent-downloads", methods=["GET"])
+def get_recent_downloads():
+    try:
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify(history.recent(limit))
+
+
+# ✅ Used by frontend to track downloads and update history
+@api_bp.route("/api/download-history", methods=["POST"])
+def update_download_history():
+    data = request.get_json()
+    filename = data.get("filename")
+    if not filename:
+        return jsonify({"error": "Missing filename"}), 400
+
+    if not storage.exists(filename):
+        return jsonify({"error": "File does not exist"}), 404
+
+    # Avoid duplicates (the store keeps one entry per filename)
+    file_type = "tesda" if filename.lower().endswith(".xlsx") else "certificate"
+    history.add({
+        "type": file_type,
+        "filename": filename,
+        "timestamp": datetime.fromtimestamp(storage.stat(filename)["mtime"]).strftime("%Y-%m-%d %H:%M"),
+        "url": f"/static/generated/{filename}"
+    }, replace=False)
+
+    return jsonify({"success": True})
+
+
+# =================== EXCEL GENERATION WITH DATABASE INTEGRATION ===================
+
+@api_bp.route('/api/generate/excel', methods=['POST'])
+def generate_excel():
+    # Validate request
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    try:
+        students = generation.resolve_rows(request.json, "students")
+    except GenerationError as e:
+        return jsonify({"error": str(e)}), e.status
+    if not students:
+        return jsonify({"error": "No student data received"}), 400
+
+    template_path = os.path.join("uploads", "templates", "Grades.xlsx")
+    if not os.path.exists(template_path):
+        return jsonify({"error": f"Template file not found at {template_path}"}), 500
+
+    job_id = jobs.submit('grades', _grades_excel_job, template_path, students, total=len(students))
+    if wants_async():
+        return job_accepted(job_id)
+
+    job = jobs.wait(job_id)
+    if job["status"] != DONE:
+        return jsonify({"error": "Failed to generate Excel file", "details": job["error"]}), 500
+    result = job["result"]
+    response = send_file(
+        result["path"],
+        mimetype=result["mimetype"],
+        as_attachment=True,
+        download_name=result["filename"]
+    )
+    if result.get("insert_stats"):
+        response.headers["X-Insert-Stats"] = json.dumps(result["insert_stats"])
+    return response
+
+# generated_file_students columns, in insert order
+STUDENT_SCORE_COLUMNS = (
+    "over_all", "WI", "CO", "5S", "BO", "CBO", "SDG", "OHSA", "WE", "UJC", "ISO", "PO", "HR", "DS",
+    "WI2", "ELEX", "CM", "SPC", "PROD", "PerDev", "Supp", "AppDev", "Tech",
+)
+STUDENT_INSERT_COLUMNS = (
+    "file_id", "last_name", "first_name", "middle_name", "strand", "department",
+    "school", "batch", "date_of_immersion", *STUDENT_SCORE_COLUMNS,
+)
+# Cap on rows per INSERT statement; 0 = limited by max_allowed_packet only,
+# 1 = the old per-row inserts (useful as a throughput baseline)
+STUDENT_INSERT_MAX_ROWS = int(os.getenv("STUDENT_INSERT_MAX_ROWS", "0"))
+# Columns a PUT /api/generated-files/<id> may change, in statement order
+STUDENT_UPDATE_COLUMNS = ("last_name", "first_name", "middle_name", "strand", "department", *STUDENT_SCORE_COLUMNS)
+
+def _fill_grades_workbook(wb, students, batch, school, date_of_immersion, progress=None):
+    """Write the header and one row per student into the Grades.xlsx sheets."""
+    # Map departments to worksheets
+    sheet_map = {
+        "PRODUCTION": wb["PRODUCTION"],
+        "SUPPORT": wb["SUPPORT"],
+        "TECHNICAL": wb["TECHNICAL"]
+    }
+
+    # Fill header cells for all sheets
+    for ws in wb.worksheets:
+        ws['H8'] = f"{batch} - {school}"
+        ws['H9'] = f"Date of Immersion: {date_of_immersion}"
+
+    # Fill student data
+    row_counter = {"PRODUCTION": 10, "SUPPORT": 10, "TECHNICAL": 10}
+
+    for done, s in enumerate(students, start=1):
+        dept_raw = (s.get("department") or "").strip().upper()
+        if dept_raw in ["TECHNICAL", "IT"]:
+            dept = "TECHNICAL"
+        elif dept_raw in ["PRODUCTION", "PROD"]:
+            dept = "PRODUCTION"
+        else:
+            dept = "SUPPORT"
+
+        ws = sheet_map[dept]
+        row = row_counter[dept]
+
+        # Fill basic info
+        ws[f'B{row}'] = s.get("last_name", "")
+        ws[f'C{row}'] = s.get("first_name", "")
+        ws[f'D{row}'] = s.get("middle_name", "")
+        ws[f'E{row}'] = s.get("strand", "")
+        ws[f'F{row}'] = s.get("department", "")
+        ws[f'G{row}'] = to_number(s.get("over_all", ""))
+
+        # Fill grades
+        ws[f'H{row}'] = to_number(s.get("WI", ""))
+        ws[f'I{row}'] = to_number(s.get("CO", ""))
+        ws[f'J{row}'] = to_number(s.get("5S", ""))
+        ws[f'K{row}'] = to_number(s.get("BO", ""))
+        ws[f'L{row}'] = to_number(s.get("CBO", ""))
+        ws[f'M{row}'] = to_number(s.get("SDG", ""))
+        ws[f'N{row}'] = to_number(s.get("OHSA", ""))
+        ws[f'O{row}'] = to_number(s.get("WE", ""))
+        ws[f'P{row}'] = to_number(s.get("UJC", ""))
+        ws[f'Q{row}'] = to_number(s.get("ISO", ""))
+        ws[f'R{row}'] = to_number(s.get("PO", ""))
+        ws[f'S{row}'] = to_number(s.get("HR", ""))
+        ws[f'AC{row}'] = to_number(s.get("DS", ""))
+
+        if dept == "PRODUCTION":
+            ws[f'V{row}'] = to_number(s.get("WI2", ""))
+            ws[f'W{row}'] = to_number(s.get("ELEX", ""))
+            ws[f'X{row}'] = to_number(s.get("CM", ""))
+            ws[f'Y{row}'] = to_number(s.get("SPC", ""))
+            ws[f'AB{row}'] = to_number(s.get("PROD", ""))
+
+        if dept == "SUPPORT":
+            ws[f'U{row}'] = to_number(s.get("PerDev", ""))
+            ws[f'Z{row}'] = to_number(s.get("Supp", ""))
+
+        if dept == "TECHNICAL":
+            ws[f'T{row}'] = to_number(s.get("AppDev", ""))
+            ws[f'AA{row}'] = to_number(s.get("Tech", ""))
+
+        row_counter[dept] += 1
+        if progress:
+            progress(done)
+
+def _grades_excel_job(ctx, template_path, students):
+    from openpyxl import load_workbook
+
+    connection = None
+    file_id = None
+    insert_stats = None
+    try:
+        # Load template
+        try:
+            wb = load_workbook(template_path)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load Excel template: {str(e)}")
+
+        # Get file info from first student
+        first_student = students[0] if students else {}
+        immersion_date = first_student.get("date_of_immersion", "")
+        batch = str(first_student.get("batch", ""))
+        school = str(first_student.get("school", ""))
+
+        # Generate Excel file
+        _fill_grades_workbook(wb, students, batch, school, immersion_date, progress=ctx.progress)
+
+        # Save Excel file; the job folder keeps it around for the download endpoint
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_batch = batch.replace(" ", "_") if batch else "Batch"
+        filename = f"Immersion_Grades_{safe_batch}_{timestamp}.xlsx"
+        output_path = os.path.join(ctx.work_dir, filename)
+        wb.save(output_path)
+
+        # Save to database
+        try:
+            connection = get_db_connection()
+            cursor = connection.cursor()
+
+            # Insert into generated_files table
+            file_insert_query = """
+            INSERT INTO generated_files (filename, original_filename, file_type, batch, school, 
+                                       date_of_immersion, total_students, file_path, file_size)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            file_size = os.path.getsize(output_path)
+            immersion_date_parsed = None
+            if immersion_date:
+                try:
+                    immersion_date_parsed = datetime.strptime(immersion_date, "%Y-%m-%d").date()
+                except:
+                    pass
+
+            cursor.execute(file_insert_query, (
+                filename, filename, 'grades', batch, school,
+                immersion_date_parsed, len(students), output_path, file_size
+            ))
+            
+            file_id = cursor.lastrowid
+
+            # Insert students data in as few statements as the packet size allows
+            student_rows = [
+                (
+                    file_id, s.get("last_name", ""), s.get("first_name", ""), s.get("middle_name", ""),
+                    s.get("strand", ""), s.get("department", ""), school, batch, immersion_date_parsed,
+                    *(to_number(s.get(col)) for col in STUDENT_SCORE_COLUMNS)
+                )
+                for s in students
+            ]
+            insert_stats = bulk_insert(
+                cursor, "generated_file_students", STUDENT_INSERT_COLUMNS, student_rows,
+                max_rows=STUDENT_INSERT_MAX_ROWS
+            )
+            logger.info(
+                f"Inserted {insert_stats['rows']} students in {insert_stats['statements']} statement(s), "
+                f"{insert_stats['seconds']}s ({insert_stats['rows_per_second']} rows/s)"
+            )
+            _refresh_file_stats(connection, cursor, file_id)
+
+            # Log the operation
+            log_query = """
+            INSERT INTO file_operations_log (file_id, operation_type, operation_details)
+            VALUES (%s, %s, %s)
+            """
+            cursor.execute(log_query, (file_id, 'create', json.dumps({'students_count': len(students)})))
+
+            connection.commit()
+            
+            # Track in recent downloads
+            history.add({
+                "type": "grades",
+                "filename": filename,
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "url": f"/static/generated/{filename}",
+                "file_id": file_id
+            })
+
+        except Exception as db_error:
+            logger.error(f"Database error: {str(db_error)}")
+            # Continue with file generation even if database fails
+            if connection:
+                connection.rollback()
+
+        return {
+            "files": [filename],
+            "path": output_path,
+            "filename": filename,
+            "mimetype": 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            "file_id": file_id,
+            "insert_stats": insert_stats,
+        }
+
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        logger.error(f"Error in generate_excel: {str(e)}\n{traceback.format_exc()}")
+        raise
+
+    finally:
+        if connection:
+            connection.close()
+
+# =================== DATABASE CRUD OPERATIONS ===================
+
+# Get all generated files
+# Newest first. Without ?limit= the whole listing is returned as before;
+# with it, the listing is keyset-paginated on (created_at, id): pass the
+# returned next_cursor as ?cursor= for the following page. batch, school
+# and created_from/created_to (YYYY-MM-DD, inclusive) narrow the listing;
+# each filter combination is served by an index (sql/migrations/0002).
+FILES_PAGE_SIZE = int(os.getenv("FILES_PAGE_SIZE", "50"))
+FILES_PAGE_MAX = int(os.getenv("FILES_PAGE_MAX", "500"))
+
+# Until migration 0002 adds the denormalised columns they are computed here
+_STUDENT_COUNT_COMPUTED = """(SELECT COUNT(*) FROM generated_file_students
+     WHERE file_id = generated_files.id) AS student_count"""
+_FILE_COLUMNS_COMPUTED = f"""generated_files.*,
+    {_STUDENT_COUNT_COMPUTED},
+    (SELECT AVG(over_all) FROM generated_file_students
+     WHERE file_id = generated_files.id) AS average_performance"""
+
+@api_bp.route('/api/generated-files', methods=['GET'])
+def get_generated_files():
+    try:
+        limit = None
+        if request.args.get('limit') or request.args.get('cursor'):
+            limit = min(int(request.args.get('limit') or FILES_PAGE_SIZE), FILES_PAGE_MAX)
+            if limit < 1:
+                raise ValueError("limit must be positive")
+        where, params = _file_listing_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        # student_count/average_performance are kept up to date on write
+        # (_refresh_file_stats), so no join against the students table here
+        columns = "*" if migrations.is_applied(connection, 2) else _FILE_COLUMNS_COMPUTED
+        query = f"""
+        SELECT {columns} FROM generated_files
+        WHERE {' AND '.join(where)}
+        ORDER BY created_at DESC, id DESC
+        """
+        if limit is not None:
+            query += "LIMIT %s"
+            params.append(limit + 1)
+        cursor.execute(query, params)
+        files = cursor.fetchall()
+
+        next_cursor = None
+        if limit is not None and len(files) > limit:
+            files = files[:limit]
+            next_cursor = _encode_file_cursor(files[-1])
+        
+        # Convert datetime objects to strings for JSON serialization
+        for file in files:
+            for key in ('created_at', 'updated_at', 'date_of_immersion'):
+                if file[key]:
+                    file[key] = file[key].isoformat()
+                
+        return jsonify({"files": files, "next_cursor": next_cursor}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting generated files: {str(e)}")
+        return jsonify({"error": "Failed to fetch files"}), 500
+    finally:
+        if connection:
+            connection.close()
+
+def _file_listing_filters(args):
+    where = ["status = 'active'"]
+    params = []
+    for column in ('batch', 'school'):
+        if args.get(column):
+            where.append(f"{column} = %s")
+            params.append(args[column])
+    if args.get('created_from'):
+        where.append("created_at >= %s")
+        params.append(_parse_day(args['created_from'], 'created_from'))
+    if args.get('created_to'):
+        where.append("created_at < %s")
+        params.append(_parse_day(args['created_to'], 'created_to') + timedelta(days=1))
+    if args.get('cursor'):
+        created_at, file_id = _decode_file_cursor(args['cursor'])
+        where.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params.extend((created_at, created_at, file_id))
+    return where, params
+
+def _parse_day(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+
+def _encode_file_cursor(file):
+    token = f"{file['created_at'].isoformat()}|{file['id']}"
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+def _decode_file_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, file_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(file_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def _refresh_file_stats(connection, cursor, file_id):
+    """Recompute a file's denormalised student_count/average_performance.
+
+    A no-op until migration 0002 has added the columns, so a backend that is
+    deployed ahead of its migration still saves files.
+    """
+    if not migrations.is_applied(connection, 2):
+        return
+    cursor.execute(
+        """
+        UPDATE generated_files gf
+        JOIN (
+            SELECT COUNT(*) AS n, AVG(over_all) AS avg_over_all
+            FROM generated_file_students WHERE file_id = %s
+        ) s
+        SET gf.student_count = s.n, gf.average_performance = s.avg_over_all
+        WHERE gf.id = %s
+        """,
+        (file_id, file_id),
+    )
+
+# Get specific file with student data
+@api_bp.route('/api/generated-files/<int:file_id>', methods=['GET'])
+def get_file_details(file_id):
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        # Get file info
+        file_query = "SELECT * FROM generated_files WHERE id = %s AND status = 'active'"
+        cursor.execute(file_query, (file_id,))
+        file_info = cursor.fetchone()
+        
+        if not file_info:
+            return jsonify({"error": "File not found"}), 404
+        
+        # Get student data
+        students_query = "SELECT * FROM generated_file_students WHERE file_id = %s ORDER BY last_name, first_name"
+        cursor.execute(students_query, (file_id,))
+        students = cursor.fetchall()
+        
+        # Convert datetime objects to strings
+        if file_info['created_at']:
+            file_info['created_at'] = file_info['created_at'].isoformat()
+        if file_info['updated_at']:
+            file_info['updated_at'] = file_info['updated_at'].isoformat()
+        if file_info['date_of_immersion']:
+            file_info['date_of_immersion'] = file_info['date_of_immersion'].isoformat()
+            
+        for student in students:
+            if student['created_at']:
+                student['created_at'] = student['created_at'].isoformat()
+            if student['updated_at']:
+                student['updated_at'] = student['updated_at'].isoformat()
+            if student['date_of_immersion']:
+                student['date_of_immersion'] = student['date_of_immersion'].isoformat()
+        
+        return jsonify({"file": file_info, "students": students}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting file details: {str(e)}")
+        return jsonify({"error": "Failed to fetch file details"}), 500
+    finally:
+        if connection:
+            connection.close()
+
+# Update file and student data
+# Replace your existing update_file function with this corrected version
+
+@api_bp.route('/api/generated-files/<int:file_id>', methods=['PUT'])
+def update_file(file_id):
+    connection = None
+    try:
+        if not request.is_json:
+            return jsonify({"error": "Request must be JSON"}), 400
+            
+        data = request.json
+        students = data.get("students", [])
+        
+        current_app.logger.info(f"Updating file {file_id} with {len(students)} students")
+        
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        
+        # Check if file exists
+        cursor.execute("SELECT id FROM generated_files WHERE id = %s AND status = 'active'", (file_id,))
+        if not cursor.fetchone():
+            return jsonify({"error": "File not found"}), 404
+        
+        # Update file info if provided
+        file_update_fields = []
+        file_update_values = []
+        
+        if 'batch' in data and data['batch']:
+            file_update_fields.append("batch = %s")
+            file_update_values.append(data['batch'])
+        if 'school' in data and data['school']:
+            file_update_fields.append("school = %s")
+            file_update_values.append(data['school'])
+        if 'date_of_immersion' in data and data['date_of_immersion']:
+            file_update_fields.append("date_of_immersion = %s")
+            try:
+                immersion_date = datetime.strptime(data['date_of_immersion'], "%Y-%m-%d").date()
+                file_update_values.append(immersion_date)
+            except ValueError:
+                file_update_values.append(None)
+            
+        if file_update_fields:
+            file_update_fields.append("updated_at = CURRENT_TIMESTAMP")
+            file_update_query = f"UPDATE generated_files SET {', '.join(file_update_fields)} WHERE id = %s"
+            file_update_values.append(file_id)
+            cursor.execute(file_update_query, file_update_values)
+            current_app.logger.info(f"Updated file metadata for file_id {file_id}")
+        
+        # Only students whose values differ from the stored row are written,
+        # in as few batched statements as the packet size allows
+        student_results = []
+        update_stats = None
+        if students:
+            student_results, update_stats = _update_students(cursor, file_id, students)
+            counts = {}
+            for result in student_results:
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+            current_app.logger.info(f"File {file_id} students: {counts}")
+        updated_students = sum(1 for r in student_results if r["status"] == "updated")
+        if updated_students:
+            _refresh_file_stats(connection, cursor, file_id)
+
+        # Log the operation
+        try:
+            log_query = """
+            INSERT INTO file_operations_log (file_id, operation_type, operation_details)
+            VALUES (%s, %s, %s)
+            """
+            cursor.execute(log_query, (file_id, 'update', json.dumps({
+                'updated_students': updated_students,
+                'file_metadata_updated': len(file_update_fields) > 0
+            })))
+        except Exception as log_error:
+            current_app.logger.warning(f"Failed to log operation: {str(log_error)}")
+            # Don't fail the whole operation for logging issues
+        
+        connection.commit()
+        if updated_students or file_update_fields:
+            grades_cache.evict(file_id)
+        current_app.logger.info(f"File {file_id} update completed successfully")
+        return jsonify({
+            "message": "File updated successfully",
+            "updated_students": updated_students,
+            "students": student_results,
+            "update_stats": update_stats,
+        }), 200
+        
+    except db.Error as db_error:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Database error updating file {file_id}: {str(db_error)}")
+        return jsonify({"error": "Database error occurred", "details": str(db_error)}), 500
+        
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Error updating file {file_id}: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({"error": "Failed to update file", "details": str(e)}), 500
+        
+    finally:
+        if connection:
+            connection.close()
+
+def _update_students(cursor, file_id, students):
+    """Diff `students` against the stored rows and batch-update the changed ones.
+
+    Returns one `{"id", "status"}` result per incoming student (status is
+    updated, unchanged, not_found, missing_id or failed, with `error` for
+    the latter) and the bulk_update stats.
+    """
+    cursor.execute(
+        f"SELECT id, {', '.join(f'`{c}`' for c in STUDENT_UPDATE_COLUMNS)} "
+        "FROM generated_file_students WHERE file_id = %s",
+        (file_id,),
+    )
+    stored = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    results = []
+    changed = []
+    for student in students:
+        student_id = student.get('id')
+        name = f"{student.get('first_name', '')} {student.get('last_name', '')}"
+        if not student_id:
+            logger.debug(f"File {file_id}: student without id skipped: {name}")
+            results.append({"id": None, "status": "missing_id"})
+            continue
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            results.append({"id": student_id, "status": "not_found"})
+            continue
+        if student_id not in stored:
+            logger.debug(f"File {file_id}: no student with id {student_id} ({name})")
+            results.append({"id": student_id, "status": "not_found"})
+            continue
+
+        values = _student_update_values(student)
+        if all(_same_value(new, old, numeric=idx >= 5)
+               for idx, (new, old) in enumerate(zip(values, stored[student_id]))):
+            logger.debug(f"File {file_id}: student {student_id} unchanged")
+            results.append({"id": student_id, "status": "unchanged"})
+            continue
+        changed.append((student_id, file_id, *values))
+        results.append({"id": student_id, "status": "updated"})
+
+    stats = None
+    if changed:
+        stats = bulk_update(
+            cursor, "generated_file_students", ("id", "file_id"), STUDENT_UPDATE_COLUMNS, changed
+        )
+        failed = stats.pop("failed")
+        for result in results:
+            error = failed.get((result["id"], file_id))
+            if error:
+                result.update(status="failed", error=error)
+                logger.debug(f"File {file_id}: student {result['id']} failed: {error}")
+            elif result["status"] == "updated":
+                logger.debug(f"File {file_id}: student {result['id']} updated")
+    return results, stats
+
+def _student_update_values(student):
+    # Missing names default to '' and missing scores to NULL, as before
+    return (
+        *(student.get(c, "") for c in STUDENT_UPDATE_COLUMNS[:5]),
+        *(to_number(student.get(c)) for c in STUDENT_SCORE_COLUMNS),
+    )
+
+def _same_value(new, old, numeric=False):
+    if new in (None, "") or old in (None, ""):
+        return new in (None, "") and old in (None, "")
+    if numeric:
+        try:
+            return float(new) == float(old)
+        except (TypeError, ValueError):
+            pass
+    return str(new) == str(old)
+
+# Delete file (soft delete)
+@api_bp.route('/api/generated-files/<int:file_id>', methods=['DELETE'])
+def delete_file(file_id):
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        
+        # Without migration 0003 the students are not deleted with their file
+        cascade = migrations.is_applied(connection, 3)
+
+        # Check if file exists first
+        cursor.execute("SELECT id, filename, file_path FROM generated_files WHERE id = %s", (file_id,))
+        file_info = cursor.fetchone()
+        
+        if not file_info:
+            return jsonify({"error": "File not found"}), 404
+        
+        file_path = file_info[2] if file_info[2] else None
+        filename = file_info[1]
+        
+        current_app.logger.info(f"Starting hard delete for file_id {file_id} ({filename})")
+        
+        # Log the operation BEFORE deletion (since we're deleting the file record)
+        try:
+            log_query = """
+            INSERT INTO file_operations_log (file_id, operation_type, operation_details)
+            VALUES (%s, %s, %s)
+            """
+            cursor.execute(log_query, (file_id, 'hard_delete', json.dumps({
+                'filename': filename,
+                'file_path': file_path
+            })))
+        except Exception as log_error:
+            current_app.logger.warning(f"Failed to log delete operation: {str(log_error)}")
+        
+        # Delete the student records, or have them go with the file record
+        # (ON DELETE CASCADE) once the foreign key is there
+        if cascade:
+            cursor.execute("SELECT student_count FROM generated_files WHERE id = %s", (file_id,))
+            deleted_students = cursor.fetchone()[0]
+        else:
+            cursor.execute("DELETE FROM generated_file_students WHERE file_id = %s", (file_id,))
+            deleted_students = cursor.rowcount
+        cursor.execute("DELETE FROM generated_files WHERE id = %s", (file_id,))
+        deleted_files = cursor.rowcount
+        
+        if deleted_files == 0:
+            # This shouldn't happen since we checked existence above, but just in case
+            connection.rollback()
+            return jsonify({"error": "File not found during deletion"}), 404
+        
+        current_app.logger.info(f"Deleted file record and {deleted_students} student records for file_id {file_id}")
+        
+        # Try to delete the actual file from filesystem (if it exists)
+        if file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                current_app.logger.info(f"Deleted physical file: {file_path}")
+            except Exception as file_delete_error:
+                current_app.logger.warning(f"Failed to delete physical file {file_path}: {str(file_delete_error)}")
+                # Don't fail the whole operation if we can't delete the physical file
+        
+        # Commit all database changes
+        connection.commit()
+        grades_cache.evict(file_id)
+        
+        current_app.logger.info(f"Successfully completed hard delete for file_id {file_id}")
+        
+        return jsonify({
+            "message": "File and all associated data deleted successfully",
+            "details": {
+                "deleted_students": deleted_students,
+                "deleted_files": deleted_files,
+                "physical_file_deleted": file_path and os.path.exists(file_path)
+            }
+        }), 200
+        
+    except db.Error as db_error:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Database error during hard delete of file {file_id}: {str(db_error)}")
+        return jsonify({"error": "Database error occurred during deletion", "details": str(db_error)}), 500
+        
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Error during hard delete of file {file_id}: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({"error": "Failed to delete file", "details": str(e)}), 500
+        
+    finally:
+        if connection:
+            connection.close()
+
+
+# Optional: Add a separate endpoint for soft delete if you want both options
+@api_bp.route('/api/generated-files/<int:file_id>/soft-delete', methods=['DELETE'])
+def soft_delete_file(file_id):
+    """Soft delete - marks file as deleted but keeps data"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        
+        # Soft delete - just mark as deleted
+        cursor.execute("UPDATE generated_files SET status = 'deleted', updated_at = CURRENT_TIMESTAMP WHERE id = %s", (file_id,))
+        
+        if cursor.rowcount == 0:
+            return jsonify({"error": "File not found"}), 404
+        
+        # Log the operation
+        log_query = """
+        INSERT INTO file_operations_log (file_id, operation_type, operation_details)
+        VALUES (%s, %s, %s)
+        """
+        cursor.execute(log_query, (file_id, 'soft_delete', json.dumps({})))
+        
+        connection.commit()
+        grades_cache.evict(file_id)
+        current_app.logger.info(f"Soft deleted file_id {file_id}")
+        
+        return jsonify({"message": "File marked as deleted successfully"}), 200
+        
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Error soft deleting file: {str(e)}")
+        return jsonify({"error": "Failed to delete file"}), 500
+    finally:
+        if connection:
+            connection.close()
+
+
+# Rows per DELETE statement and file ids per IN (...) list during cleanup
+CLEANUP_DELETE_LIMIT = int(os.getenv("CLEANUP_DELETE_LIMIT", "5000"))
+# (once migration 0003 is applied each file's students are deleted with it by
+# ON DELETE CASCADE, so keep this modest)
+CLEANUP_CHUNK_FILES = int(os.getenv("CLEANUP_CHUNK_FILES", "50"))
+
+# Optional: Add endpoint to permanently delete soft-deleted files
+@api_bp.route('/api/generated-files/cleanup-deleted', methods=['DELETE'])
+def cleanup_deleted_files():
+    """Permanently delete all soft-deleted files and their data.
+
+    Rows go in bounded, separately committed batches; the physical files are
+    removed afterwards by a background reaper job. `?dry_run=1` only reports
+    what would be reclaimed.
+    """
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        # Without migration 0003 the students are not deleted with their file
+        cascade = migrations.is_applied(connection, 3)
+        student_count = "student_count" if migrations.is_applied(connection, 2) else _STUDENT_COUNT_COMPUTED
+
+        # Get all soft-deleted files
+        cursor.execute(f"SELECT id, filename, file_path, file_size, {student_count} "
+                       "FROM generated_files WHERE status = 'deleted'")
+        deleted_files = cursor.fetchall()
+        
+        if not deleted_files:
+            return jsonify({"message": "No deleted files to cleanup"}), 200
+
+        file_ids = [f['id'] for f in deleted_files]
+        student_rows = sum(f['student_count'] or 0 for f in deleted_files)
+
+        if request.args.get('dry_run', '').lower() in ('1', 'true', 'yes'):
+            on_disk = [f['file_path'] for f in deleted_files if f['file_path'] and os.path.exists(f['file_path'])]
+            return jsonify({
+                "message": "Dry run: nothing was deleted",
+                "details": {
+                    "files_processed": len(deleted_files),
+                    "students_deleted": student_rows,
+                    "files_deleted": len(deleted_files),
+                    "physical_files_deleted": len(on_disk),
+                    "bytes_reclaimed": sum(os.path.getsize(p) for p in on_disk),
+                    "recorded_bytes": sum(f['file_size'] or 0 for f in deleted_files),
+                },
+            }), 200
+
+        # File rows in bounded committed batches; students cascade with them,
+        # or are deleted first the same way while the foreign key is missing
+        statements = 0
+        if not cascade:
+            student_stats = bulk_delete(
+                cursor, "generated_file_students", "file_id", file_ids,
+                limit=CLEANUP_DELETE_LIMIT, chunk_keys=CLEANUP_CHUNK_FILES, commit=connection.commit,
+            )
+            student_rows = student_stats['rows']
+            statements += student_stats['statements']
+        file_stats = bulk_delete(
+            cursor, "generated_files", "id", file_ids, extra_where="status = 'deleted'",
+            limit=CLEANUP_DELETE_LIMIT, chunk_keys=CLEANUP_CHUNK_FILES, commit=connection.commit,
+        )
+        statements += file_stats['statements']
+        for file_id in file_ids:
+            grades_cache.evict(file_id)
+        current_app.logger.info(f"Cleanup removed {file_stats['rows']} files ({student_rows} student rows) "
+                                f"in {statements} statements")
+
+        reaper_job_id = jobs.submit(
+            'file_reaper', _reap_files, [(f['id'], f['file_path']) for f in deleted_files],
+            total=len(deleted_files),
+        )
+
+        return jsonify({
+            "message": "Cleanup completed successfully",
+            "details": {
+                "files_processed": len(deleted_files),
+                "students_deleted": student_rows,
+                "files_deleted": file_stats['rows'],
+                "statements": statements,
+            },
+            # physical files are removed in the background; poll /api/jobs/<id>
+            "reaper_job_id": reaper_job_id,
+        }), 200
+        
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        current_app.logger.error(f"Error during cleanup: {str(e)}")
+        return jsonify({"error": "Failed to cleanup deleted files"}), 500
+    finally:
+        if connection:
+            connection.close()
+
+def _reap_files(ctx, files):
+    """Remove the output files of purged generated_files rows."""
+    removed = 0
+    freed = 0
+    failed = []
+    for idx, (file_id, file_path) in enumerate(files):
+        if file_path and os.path.exists(file_path):
+            try:
+                size = os.path.getsize(file_path)
+                os.remove(file_path)
+                catalog.discard(os.path.basename(file_path))
+                removed += 1
+                freed += size
+            except OSError as e:
+                logger.warning(f"Failed to delete physical file {file_path}: {str(e)}")
+                failed.append(file_path)
+        ctx.progress(idx + 1)
+    logger.info(f"Reaper removed {removed} files ({freed} bytes)")
+    return {"physical_files_deleted": removed, "bytes_freed": freed, "failed": failed}
+
+# Regenerate and download Excel file
+@api_bp.route('/api/generated-files/<int:file_id>/download', methods=['GET'])
+def download_file(file_id):
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        # Get file info
+        file_query = "SELECT * FROM generated_files WHERE id = %s AND status = 'active'"
+        cursor.execute(file_query, (file_id,))
+        file_info = cursor.fetchone()
+        
+        if not file_info:
+            return jsonify({"error": "File not found"}), 404
+        
+        template_path = os.path.join("uploads", "templates", "Grades.xlsx")
+        if not os.path.exists(template_path):
+            return jsonify({"error": "Template file not found"}), 500
+
+        # The rendered workbook only changes with the rows or the template,
+        # so repeat downloads are served from the artifact cache
+        cursor.execute(
+            "SELECT COUNT(*) AS n, MAX(updated_at) AS latest FROM generated_file_students WHERE file_id = %s",
+            (file_id,)
+        )
+        students_version = cursor.fetchone()
+        template_stat = os.stat(template_path)
+        digest = grades_cache.digest(
+            file_info.get('updated_at'), students_version['n'], students_version['latest'],
+            template_stat.st_mtime_ns, template_stat.st_size
+        )
+        output_path = grades_cache.get(file_id, digest)
+
+        if output_path is None:
+            # Regenerate Excel file with current data
+            students_query = "SELECT * FROM generated_file_students WHERE file_id = %s"
+            cursor.execute(students_query, (file_id,))
+            students = cursor.fetchall()
+
+            from openpyxl import load_workbook
+
+            wb = load_workbook(template_path)
+            date_of_immersion = file_info.get('date_of_immersion', '')
+            if date_of_immersion:
+                date_of_immersion = date_of_immersion.strftime("%Y-%m-%d") if hasattr(date_of_immersion, 'strftime') else str(date_of_immersion)
+            _fill_grades_workbook(wb, students, file_info.get('batch', ''), file_info.get('school', ''), date_of_immersion)
+            output_path = grades_cache.put(file_id, digest, wb.save)
+        
+        # Log download
+        log_query = """
+        INSERT INTO file_operations_log (file_id, operation_type, operation_details)
+        VALUES (%s, %s, %s)
+        """
+        cursor.execute(log_query, (file_id, 'download', json.dumps({})))
+        connection.commit()
+        
+        return send_file(
+            output_path,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=file_info['filename']
+        )
+        
+    except Exception as e:
+        current_app.logger.error(f"Error downloading file: {str(e)}")
+        return jsonify({"error": "Failed to download file", "details": str(e)}), 500
+    finally:
+        if connection:
+            connection.close()
+
+# Artifact cache metrics: hits, misses, evictions and size on disk
+@api_bp.route('/api/generated-files/cache', methods=['GET'])
+def artifact_cache_stats():
+    return jsonify(grades_cache.stats())
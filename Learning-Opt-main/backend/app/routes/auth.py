@@ -1,15 +1,9 @@
 # routes/auth.py
-import sys
-import os
 from flask import Blueprint, request, jsonify
 from flask_cors import CORS
 import logging
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.insert(0, parent_dir)
-
-import config  # Relative import
+from app import config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -1,15 +1,16 @@
 # backend/app/routes/excel_generate.py
+import io
 import os
 import re
-from flask import Blueprint, request, jsonify, send_file, current_app
+import json
+from flask import Blueprint, request, jsonify, current_app
 
+from app.services.catalog import catalog
 from app.services.excel_filler import ExcelTemplateFiller
-
-# Optional: Import shared history tracker
-try:
-    from run import recent_downloads
-except ImportError:     
-    recent_downloads = []
+from app.routes.jobs import job_accepted, wants_async
+from app.services.history import history
+from app.services.jobs import DONE, jobs
+from app.services.storage import send_artifact, storage
 
 excel_bp = Blueprint("excel_bp",  __name__, url_prefix="/api")
 
@@ -24,21 +25,13 @@ def delete_excel_file():
     if not filename:
         return jsonify({"error": "Filename is required"}), 400
 
-    # Secure path to /static/generated/
-    generated_dir = os.path.join("static", "generated")
-    file_path = os.path.join(generated_dir, filename)
-
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File not found"}), 404
-
     try:
-        os.remove(file_path)
+        if not storage.delete(filename):
+            return jsonify({"error": "File not found"}), 404
+        catalog.discard(filename)
 
-        # Optionally remove from recent_downloads
-        global recent_downloads
-        recent_downloads = [
-            item for item in recent_downloads if item.get("filename") != filename
-        ]
+        # Also drop it from the download history
+        history.remove(filename)
 
         return jsonify({"message": "File deleted successfully"}), 200
 
@@ -75,31 +68,51 @@ def generate_excel():
     template_path = getattr(current_app, "EXCEL_TEMPLATE_PATH", DEFAULT_TEMPLATE_PATH)
     print(f"[INFO] Using template: {template_path}  (exists={os.path.exists(template_path)})")
 
-    try:
-        filler = ExcelTemplateFiller(template_path, default_mapping=DEFAULT_MAPPING)
-        out_io, _ = filler.generate_from_filestorage(f, mapping_json)
-
-        # Save to /static/generated/
-        output_dir = os.path.join("static", "generated")
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, out_name)
-        with open(output_path, "wb") as out_file:
-            out_file.write(out_io.getbuffer())
-
-        # Track in download history
-        recent_downloads.insert(0, {
-            "type": "tesda",
-            "filename": out_name,
-            
-            "url": f"/static/generated/{out_name}"
-        })
-
-    except Exception as e:
-        return err(str(e), status=500)
-
-    return send_file(
-        output_path,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=out_name,
-    )
\ No newline at end of file
+    # The upload is read now; the request's stream is gone once the job runs
+    job_id = jobs.submit(
+        "excel", _generate_excel_job, f.read(), mapping_json, template_path,
+        request.form.get("duplicates", "first"), out_name,
+    )
+    if wants_async():
+        return job_accepted(job_id)
+
+    job = jobs.wait(job_id)
+    if job["status"] != DONE:
+        return err(job["error"], status=500)
+
+    result = job["result"]
+    response = send_artifact(result["artifact"], download_name=out_name, mimetype=result["mimetype"])
+    # matched / unmatched / duplicate counts of the details-to-grades join
+    response.headers["X-Join-Stats"] = json.dumps(result["join_stats"])
+    return response
+
+
+def _generate_excel_job(ctx, upload, mapping_json, template_path, duplicate_policy, out_name):
+    filler = ExcelTemplateFiller(
+        template_path,
+        default_mapping=DEFAULT_MAPPING,
+        duplicate_policy=duplicate_policy,
+    )
+    out_io, _ = filler.generate_from_filestorage(io.BytesIO(upload), mapping_json, progress=ctx.progress)
+    print(f"[INFO] Grades join: {filler.join_stats}")
+
+    # Save to /static/generated/ (re-uploading the same workbook replaces its output)
+    storage.put_bytes(out_name, out_io.getbuffer(), overwrite=True)
+    catalog.touch(out_name)
+
+    # Track in download history
+    history.add({
+        "type": "tesda",
+        "filename": out_name,
+        
+        "url": f"/static/generated/{out_name}"
+    })
+
+    return {
+        "files": [out_name],
+        "artifact": out_name,
+        "path": storage.local_path(out_name),
+        "filename": out_name,
+        "mimetype": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "join_stats": filler.join_stats,
+    }
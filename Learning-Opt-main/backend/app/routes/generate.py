@@ -1,38 +1,30 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_cors import cross_origin
-from pptx import Presentation
 import os
 import json
 import io
 import re
-from copy import deepcopy
 from datetime import datetime
 
+from app.services.catalog import catalog
+from app.services.certificate_renderer import iter_certificates_zip
+from app.services.generation import GenerationError, certificate_template_path, resolve_rows, submit_certificates
+from app.services.jobs import DONE, jobs
+from app.services.pptx_templates import get_template
+from app.services.storage import send_artifact, storage
+from app.routes.jobs import job_accepted, wants_async
+
 
 bp = Blueprint('generate', __name__, url_prefix='/generate')
 
 # Paths
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 TEMPLATE_DIR = os.path.join(BASE_DIR, 'uploads', 'templates')
-OUTPUT_DIR = os.path.join(BASE_DIR, 'static', 'generated')
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# Helper to fill slide placeholders
-def fill_slide(slide, data_row):
-    for shape in slide.shapes:
-        if not shape.has_text_frame:
-            continue
-        for paragraph in shape.text_frame.paragraphs:
-            full_text = ''.join(run.text for run in paragraph.runs)
-            replaced = full_text
-            for key, value in data_row.items():
-                ph = f"{{{key}}}"
-                replaced = replaced.replace(ph, str(value))
-            if replaced != full_text:
-                for run in paragraph.runs:
-                    run.text = ""
-                paragraph.runs[0].text = replaced
+
+def _certificate_entry_name(template_type, idx, row):
+    name = next((str(v) for k, v in row.items() if k.strip().lower() == "name" and v), "")
+    safe_name = re.sub(r'[^a-zA-Z0-9_-]', '_', name.strip())
+    return f"{idx + 1:04d}_{safe_name or 'certificate'}_{template_type}.pptx"
 
 @bp.route('/delete_certificate', methods=['DELETE'])
 @cross_origin()
@@ -41,13 +33,10 @@ def delete_certificate():
     if not filename:
         return jsonify({"error": "Filename is required"}), 400
 
-    file_path = os.path.join(OUTPUT_DIR, filename)
-
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File not found"}), 404
-
     try:
-        os.remove(file_path)
+        if not storage.delete(filename):
+            return jsonify({"error": "File not found"}), 404
+        catalog.discard(filename)
         return jsonify({"message": "File deleted successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -57,50 +46,59 @@ def delete_certificate():
 def generate_certificates():
     data = request.get_json()
     template_type = data.get('template', 'ojt')
-    rows = data.get('rows', [])
-
-    if not rows:
-        return jsonify({"error": "No data provided"}), 400
-
-    tpl_filename = f"{template_type}.pptx"
-    template_path = os.path.join(TEMPLATE_DIR, tpl_filename)
-    if not os.path.exists(template_path):
-        return jsonify({"error": f"Template '{tpl_filename}' not found"}), 404
-
-    prs = Presentation(template_path)
-    source_slide = prs.slides[0]
-    original_elements = [deepcopy(shape.element) for shape in source_slide.shapes]
-    fill_slide(source_slide, rows[0])
-
-    for row in rows[1:]:
-        new_slide = prs.slides.add_slide(source_slide.slide_layout)
-        for shp in list(new_slide.shapes):
-            new_slide.shapes._spTree.remove(shp.element)
-        for el in original_elements:
-            new_slide.shapes._spTree.append(deepcopy(el))
-        fill_slide(new_slide, row)
-
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    output_name = f"certificate_{template_type} ({timestamp}).pptx"
-    output_path = os.path.join(OUTPUT_DIR, output_name)
-    prs.save(output_path)
 
-    return jsonify({"message": "Certificates generated", "files": [output_name]})
+    # One PPTX per trainee, streamed as a ZIP while it is being built
+    if data.get('output') == 'zip':
+        try:
+            rows = resolve_rows(data, 'rows')
+            if not rows:
+                return jsonify({"error": "No data provided"}), 400
+            template_path = certificate_template_path(template_type)
+        except GenerationError as e:
+            return jsonify({"error": str(e)}), e.status
+        archive_name = f"certificates_{template_type} ({timestamp}).zip"
+        names = (_certificate_entry_name(template_type, idx, row) for idx, row in enumerate(rows))
+        return Response(
+            stream_with_context(iter_certificates_zip(template_path, rows, names)),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{archive_name}"'},
+        )
+
+    try:
+        job_id = submit_certificates(data, timestamp)
+    except GenerationError as e:
+        return jsonify({"error": str(e)}), e.status
+    if wants_async():
+        return job_accepted(job_id)
+
+    job = jobs.wait(job_id)
+    if job["status"] != DONE:
+        return jsonify({"error": f"Failed to generate certificates: {job['error']}"}), 500
+    result = job["result"]
+    return jsonify({
+        "message": "Certificates generated",
+        "files": result["files"],
+        # placeholders in the template with no matching column (likely typos)
+        "unknown_placeholders": result["unknown_placeholders"],
+    })
 
 @bp.route('/files/<filename>', methods=['GET'])
 @cross_origin()
 def get_generated_file(filename):
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+    if not storage.exists(filename):
         return jsonify({"error": "File not found"}), 404
-    return send_file(file_path, as_attachment=True, download_name=filename)  # ✅ Fix here
+    return send_artifact(filename)
 
 @bp.route('/preview', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def preview_certificate():
     data = request.get_json()
     template_type = data.get('template', 'ojt')
-    rows = data.get('rows', [])
+    try:
+        rows = resolve_rows(data, 'rows')
+    except GenerationError as e:
+        return jsonify({"error": str(e)}), e.status
 
     if not rows:
         return jsonify({"error": "No data to preview"}), 400
@@ -224,20 +222,15 @@ def preview_certificate():
         "</style></head><body><div class='container'><h2>Certificate Preview</h2>"
     ]
 
+    # The template is parsed once; each row is only string substitution
+    skeleton = get_template(template_path).skeleton
     for idx, row in enumerate(rows):
-        prs_row = Presentation(template_path)
-        slide = prs_row.slides[0]
-        fill_slide(slide, row)
         html_parts.append("<div class='slide-preview certificate-text'>")
         html_parts.append(f"<h4>Certificate {idx+1}</h4>")
 
-        for shape in slide.shapes:
-            if not shape.has_text_frame:
-                continue
-            for paragraph in shape.text_frame.paragraphs:
-                text = ''.join(run.text for run in paragraph.runs)
-                if text.strip():
-                    html_parts.append(f"<p>{text}</p>")
+        for text in skeleton.render(row):
+            if text.strip():
+                html_parts.append(f"<p>{text}</p>")
         html_parts.append("</div>")
     html_parts.append("</div></body></html>")
     return "\n".join(html_parts), 200, {"Content-Type": "text/html"}
\ No newline at end of file
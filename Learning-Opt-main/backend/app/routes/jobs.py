@@ -0,0 +1,78 @@
+# backend/app/routes/jobs.py
+import os
+from flask import Blueprint, jsonify, request, send_file
+
+from app.services.jobs import DONE, jobs
+from app.services.storage import send_artifact, storage
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+def wants_async():
+    """True when the caller asked for a job id instead of waiting for the result.
+
+    Accepted as `?async=1`, `"async": true` in a JSON body, or a
+    `Prefer: respond-async` header.
+    """
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    body = request.get_json(silent=True) if request.is_json else None
+    return isinstance(body, dict) and bool(body.get('async'))
+
+
+def job_accepted(job_id):
+    """202 response returned by the generation routes in async mode."""
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}",
+        "download_url": f"/api/jobs/{job_id}/download",
+    }), 202
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    result = job["result"] or {}
+    return jsonify({
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "done": job["done"],
+        "total": job["total"],
+        "error": job["error"],
+        "files": result.get("files", []),
+        "download_url": f"/api/jobs/{job_id}/download" if result.get("artifact") or result.get("path") else None,
+    })
+
+
+@jobs_bp.route('/<job_id>/download', methods=['GET'])
+def download_job_result(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != DONE:
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+
+    result = job["result"] or {}
+    # outputs kept in the artifact store are served from there (with range support)
+    artifact = result.get("artifact")
+    if artifact:
+        if not storage.exists(artifact):
+            return jsonify({"error": "Job output is no longer available"}), 410
+        return send_artifact(artifact, download_name=result.get("filename"), mimetype=result.get("mimetype"))
+
+    path = result.get("path")
+    if not path or not os.path.exists(path):
+        return jsonify({"error": "Job output is no longer available"}), 410
+    return send_file(
+        path,
+        mimetype=result.get("mimetype"),
+        as_attachment=True,
+        download_name=result.get("filename") or os.path.basename(path),
+        conditional=True,
+    )
@@ -1,27 +1,65 @@
 # backend/app/routes/upload.py
-from flask import Blueprint, request, jsonify
-import os
-import json
-import pandas as pd
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+
+from app.services.datasets import DatasetNotFound, datasets
+from app.services.roster import iter_ndjson, read_trainees
+from app.services.uploads import UploadNotFound, uploads
 
 bp = Blueprint('upload', __name__, url_prefix='/upload')
 
 @bp.route('/excel', methods=['POST'])
 def upload_excel():
-    data = request.get_json()
+    """Register uploaded rows as a dataset; pass `upload_id` to append more rows to it.
+
+    Generation and preview requests can then send `dataset_id` instead of
+    the rows themselves.
+    """
+    data = request.get_json(silent=True) or {}
     rows = data.get('rows', [])
-    
-    upload_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'excel')
-    os.makedirs(upload_path, exist_ok=True)
-    file_path = os.path.join(upload_path, 'uploaded_data.json')
+    upload_id = data.get('upload_id') or data.get('dataset_id')
+
+    if not isinstance(rows, list):
+        return jsonify({'error': 'rows must be a list'}), 400
+
+    try:
+        if upload_id:
+            dataset = datasets.append(upload_id, rows)
+        else:
+            dataset = datasets.register(rows)
+    except DatasetNotFound:
+        return jsonify({'error': 'Upload not found or expired'}), 404
 
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    return jsonify({
+        'message': 'Excel data uploaded successfully',
+        'rowCount': len(rows),
+        'totalRows': dataset['rows'],
+        'upload_id': dataset['dataset_id'],
+        'dataset_id': dataset['dataset_id'],
+        'content_hash': dataset['content_hash'],
+    })
 
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(rows, f, indent=2)
+@bp.route('/excel/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Stream an upload's rows back as NDJSON (`?info=1` for its size and expiry only)."""
+    if not uploads.exists(upload_id):
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    if request.args.get('info'):
+        return jsonify(uploads.info(upload_id))
+    rows = uploads.iter_rows(upload_id)
+    return Response(stream_with_context(iter_ndjson(rows)), mimetype='application/x-ndjson')
 
-    return jsonify({'message': 'Excel data uploaded successfully', 'rowCount': len(rows)})
+# Dataset cache metrics: hits, misses, evictions and rows held in memory
+@bp.route('/datasets/cache', methods=['GET'])
+def dataset_cache_stats():
+    return jsonify(datasets.stats())
+
+@bp.route('/excel/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    try:
+        uploads.delete(upload_id)
+    except UploadNotFound:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    return jsonify({'message': 'Upload deleted'})
 
 @bp.route('/trainee', methods=['POST'])
 def upload_trainee_file():
@@ -30,23 +68,13 @@ def upload_trainee_file():
         return jsonify({'error': 'No file uploaded'}), 400
 
     try:
-        df = pd.read_excel(file)
-
-        data = []
-        for _, row in df.iterrows():
-            data.append({
-                'first_name': row.get('FIRST NAME', ''),
-                'middle_name': row.get('MIDDLE NAME', ''),
-                'last_name': row.get('LAST NAME', ''),
-                'strand': row.get('STRAND', ''),
-                'department': row.get('DEPARTMENT', ''),
-                'school': row.get('SCHOOL', ''),
-                'batch': row.get('BATCH', ''),
-                'date_of_immersion': str(row.get('DATE OF IMMERSION', '')),
-                'status': row.get('STATUS', '')
-            })
-
-        return jsonify({'students': data})
-
+        data = read_trainees(file)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+    # Large rosters can be streamed one JSON record per line instead
+    if request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return Response(iter_ndjson(data), mimetype='application/x-ndjson',
+                        headers={'X-Total-Count': str(len(data))})
+
+    return jsonify({'students': data})
@@ -0,0 +1,123 @@
+# backend/app/services/artifact_cache.py
+import hashlib
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.join(BASE_DIR, "instance", "artifacts"))
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+class ArtifactCache:
+    """On-disk cache of rendered files, addressed by owner id and an input digest.
+
+    An entry is stored as `<owner>-<digest><ext>`, where the digest is a hash
+    of everything the rendering depends on (row timestamps, template
+    version...), so a changed input simply misses and stale entries age
+    out. `evict(owner)` drops every version at once when the owner is
+    updated or deleted. Hits bump the file's mtime, and once the directory
+    grows past `max_bytes` the least recently used entries are removed.
+    Entries are written to a temp name and renamed into place, so several
+    worker processes can share one directory.
+    """
+
+    def __init__(self, root: str = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES,
+                 ext: str = ""):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # ---- public API ----
+    @staticmethod
+    def digest(*parts: Any) -> str:
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(repr(part).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()[:32]
+
+    def get(self, owner: Any, digest: str) -> str | None:
+        """Path of the cached entry, or None on a miss."""
+        path = self._path(owner, digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return path
+
+    def put(self, owner: Any, digest: str, write: Callable[[str], None]) -> str:
+        """Render into the cache via `write(tmp_path)` and return the entry's path."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(owner, digest)
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}{self.ext}")
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        # older versions of the same owner can never be hit again
+        for stale in self._entries(owner):
+            if stale != path:
+                self._remove(stale)
+        self._enforce_limit()
+        return path
+
+    def evict(self, owner: Any):
+        for path in self._entries(owner):
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        sizes = [os.path.getsize(p) for p in self._entries()]
+        stats.update(entries=len(sizes), bytes=sum(sizes), max_bytes=self.max_bytes)
+        return stats
+
+    # ---- internals ----
+    def _path(self, owner: Any, digest: str) -> str:
+        return os.path.join(self.root, f"{owner}-{digest}{self.ext}")
+
+    def _entries(self, owner: Any = None) -> List[str]:
+        prefix = f"{owner}-" if owner is not None else ""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.root, n) for n in names if n.startswith(prefix) and not n.startswith(".tmp-")]
+
+    def _enforce_limit(self):
+        entries = []
+        for path in self._entries():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self._count("evictions")
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+
+# Rendered grade workbooks for /api/generated-files/<id>/download
+grades_cache = ArtifactCache(os.path.join(ARTIFACT_CACHE_DIR, "grades"), ext=".xlsx")
@@ -0,0 +1,157 @@
+# backend/app/services/bulk_insert.py
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+# Fallback when the server can't be asked (MySQL 5.7's default)
+DEFAULT_MAX_PACKET = 4 * 1024 * 1024
+# Share of max_allowed_packet one statement may fill; row sizes are estimates
+PACKET_HEADROOM = 0.75
+# Quotes, separator and escaping around each rendered value
+_VALUE_OVERHEAD = 4
+
+
+def max_allowed_packet(cursor) -> int:
+    try:
+        cursor.execute("SELECT @@max_allowed_packet AS max_packet")
+        row = cursor.fetchone()
+        value = row["max_packet"] if isinstance(row, dict) else row[0]
+        return int(value)
+    except Exception:
+        return DEFAULT_MAX_PACKET
+
+
+def bulk_insert(cursor, table: str, columns: Sequence[str], rows: List[Sequence[Any]],
+                max_packet: int | None = None, max_rows: int = 0) -> Dict[str, Any]:
+    """Insert `rows` with multi-row `INSERT ... VALUES (...), (...)` statements.
+
+    Rows are grouped so each statement stays under the server's
+    max_allowed_packet (and, if `max_rows` is set, under that many rows;
+    `max_rows=1` reproduces the old one-statement-per-row behaviour).
+    Nothing is committed here: the caller owns the transaction. Returns
+    row/statement counts and the measured throughput.
+    """
+    prefix = f"INSERT INTO {table} ({', '.join(f'`{c}`' for c in columns)}) VALUES "
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    limit = int((max_packet or max_allowed_packet(cursor)) * PACKET_HEADROOM) - len(prefix)
+
+    started = time.perf_counter()
+    statements = 0
+    for chunk in _chunks(rows, limit, max_rows):
+        cursor.execute(prefix + ", ".join([row_sql] * len(chunk)), [v for row in chunk for v in row])
+        statements += 1
+    seconds = time.perf_counter() - started
+
+    return {
+        "table": table,
+        "rows": len(rows),
+        "statements": statements,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(len(rows) / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def bulk_update(cursor, table: str, key_columns: Sequence[str], columns: Sequence[str],
+                rows: List[Sequence[Any]], max_packet: int | None = None,
+                touch: str | None = "updated_at") -> Dict[str, Any]:
+    """Update many rows with one joined `UPDATE` per packet-sized chunk.
+
+    Each row is `(*key values, *column values)`. A chunk becomes a derived
+    table of `SELECT ... UNION ALL SELECT ...` joined to `table` on the key
+    columns, so rows whose keys don't match anything are simply not
+    touched. If a chunk fails, its rows are retried one by one (a failed
+    statement only rolls back itself) and the keys that still fail are
+    reported under `failed`. `touch` names a timestamp column to set to
+    CURRENT_TIMESTAMP. Nothing is committed here.
+    """
+    names = [*key_columns, *columns]
+    join = " AND ".join(f"t.`{c}` = v.`{c}`" for c in key_columns)
+    assignments = [f"t.`{c}` = v.`{c}`" for c in columns]
+    if touch:
+        assignments.append(f"t.`{touch}` = CURRENT_TIMESTAMP")
+    first_select = "SELECT " + ", ".join(f"%s AS `{c}`" for c in names)
+    next_select = "SELECT " + ", ".join(["%s"] * len(names))
+    overhead = len(f"UPDATE {table} t JOIN () v ON {join} SET {', '.join(assignments)}") + len(first_select)
+    limit = int((max_packet or max_allowed_packet(cursor)) * PACKET_HEADROOM) - overhead
+
+    def execute(chunk) -> int:
+        derived = " UNION ALL ".join([first_select] + [next_select] * (len(chunk) - 1))
+        cursor.execute(
+            f"UPDATE {table} t JOIN ({derived}) v ON {join} SET {', '.join(assignments)}",
+            [value for row in chunk for value in row],
+        )
+        return cursor.rowcount
+
+    started = time.perf_counter()
+    statements = 0
+    affected = 0
+    failed: Dict[tuple, str] = {}
+    for chunk in _chunks(rows, limit, 0):
+        try:
+            affected += execute(chunk)
+            statements += 1
+        except Exception:
+            for row in chunk:
+                statements += 1
+                try:
+                    affected += execute([row])
+                except Exception as e:
+                    failed[tuple(row[:len(key_columns)])] = str(e)
+    seconds = time.perf_counter() - started
+
+    return {
+        "table": table,
+        "rows": len(rows),
+        "affected": affected,
+        "statements": statements,
+        "failed": failed,
+        "seconds": round(seconds, 4),
+    }
+
+
+def bulk_delete(cursor, table: str, column: str, keys: Sequence[Any], extra_where: str = "",
+                limit: int = 5000, chunk_keys: int = 500,
+                commit: Callable[[], None] | None = None) -> Dict[str, Any]:
+    """Delete the rows whose `column` is in `keys`, a bounded batch at a time.
+
+    Keys go `chunk_keys` at a time into `DELETE ... WHERE column IN (...)
+    LIMIT limit`, repeated until a chunk has nothing left, so no single
+    statement locks more than `limit` rows. With `commit` given it is called
+    after every statement, which releases the locks between batches.
+    """
+    started = time.perf_counter()
+    deleted = 0
+    statements = 0
+    for i in range(0, len(keys), chunk_keys):
+        chunk = list(keys[i:i + chunk_keys])
+        sql = (f"DELETE FROM {table} WHERE `{column}` IN ({', '.join(['%s'] * len(chunk))})"
+               f"{' AND ' + extra_where if extra_where else ''} LIMIT {int(limit)}")
+        while True:
+            cursor.execute(sql, chunk)
+            statements += 1
+            deleted += cursor.rowcount
+            if commit:
+                commit()
+            if cursor.rowcount < limit:
+                break
+
+    return {
+        "table": table,
+        "rows": deleted,
+        "statements": statements,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+# ---- helpers ----
+def _chunks(rows: List[Sequence[Any]], limit: int, max_rows: int) -> Iterator[List[Sequence[Any]]]:
+    chunk: List[Sequence[Any]] = []
+    size = 0
+    for row in rows:
+        row_size = sum(len(str(v).encode("utf-8")) + _VALUE_OVERHEAD for v in row) + 4
+        if chunk and (size + row_size > limit or (max_rows and len(chunk) >= max_rows)):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield chunk
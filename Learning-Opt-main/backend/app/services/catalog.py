@@ -0,0 +1,157 @@
+# backend/app/services/catalog.py
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.services.storage import storage
+
+# Even without directory changes, entries are re-stat'ed this often so files
+# rewritten in place (same name) by another worker pick up their new mtime
+FULL_RESCAN_SECONDS = float(os.getenv("CATALOG_FULL_RESCAN_SECONDS", "60"))
+
+
+class Artifact:
+    __slots__ = ("filename", "type", "size", "mtime")
+
+    def __init__(self, filename: str, type: str, size: int, mtime: float):
+        self.filename = filename
+        self.type = type
+        self.size = size
+        self.mtime = mtime
+
+    def to_dict(self, timestamp_format: str = "%Y-%m-%d %H:%M") -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "filename": self.filename,
+            "size": self.size,
+            "timestamp": datetime.fromtimestamp(self.mtime).strftime(timestamp_format),
+            "url": f"/static/generated/{self.filename}",
+        }
+
+
+class Catalog:
+    """In-memory index of the files in the generated-output folder.
+
+    Queries are answered from the index, sorted newest first. Before each
+    query the folder's own mtime is checked: it only changes when files are
+    added, removed or renamed (including a name replaced by `os.replace`),
+    and only then is the folder listed and every entry stat'ed again; the
+    stat comes with the directory scan, so this costs one pass over the
+    folder. Generators that rewrite a file in place without a rename call
+    `touch()`; other workers catch up on the periodic full rescan.
+    """
+
+    def __init__(self, folder: str = storage.root, full_rescan: float = FULL_RESCAN_SECONDS):
+        self.folder = folder
+        self.full_rescan = full_rescan
+        self._entries: Dict[str, Artifact] = {}
+        self._sorted: List[Artifact] | None = None
+        self._dir_mtime_ns: int | None = None
+        self._last_full = 0.0
+        self._lock = threading.Lock()
+
+    # ---- public API ----
+    def query(self, types: Iterable[str] | None = None, offset: int = 0,
+              limit: int | None = None) -> Tuple[List[Artifact], int]:
+        """Return one page of artifacts (newest first) and the total matching count."""
+        self.refresh()
+        with self._lock:
+            items = self._sorted_entries()
+        if types is not None:
+            wanted = set(types)
+            items = [a for a in items if a.type in wanted]
+        total = len(items)
+        end = None if limit is None else offset + limit
+        return items[offset:end], total
+
+    def refresh(self, force: bool = False):
+        try:
+            dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._entries, self._sorted, self._dir_mtime_ns = {}, None, None
+            return
+
+        full = force or time.monotonic() - self._last_full >= self.full_rescan
+        if not full and dir_mtime_ns == self._dir_mtime_ns:
+            return
+
+        with self._lock:
+            # Every entry is stat'ed again: a name another worker replaced
+            # keeps its place in the listing but has a new size and mtime
+            entries = {}
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.startswith("."):
+                        continue
+                    try:
+                        artifact = self._artifact(entry.name, entry.stat())
+                    except FileNotFoundError:
+                        continue
+                    if artifact:
+                        entries[entry.name] = artifact
+
+            self._entries = entries
+            self._sorted = None
+            self._dir_mtime_ns = dir_mtime_ns
+            if full:
+                self._last_full = time.monotonic()
+
+    def touch(self, filename: str):
+        """Record a file this process just wrote (new or rewritten in place)."""
+        try:
+            st = os.stat(os.path.join(self.folder, filename))
+        except FileNotFoundError:
+            return self.discard(filename)
+        artifact = self._artifact(filename, st)
+        with self._lock:
+            if artifact:
+                self._entries[filename] = artifact
+                self._sorted = None
+
+    def discard(self, filename: str):
+        with self._lock:
+            if self._entries.pop(filename, None):
+                self._sorted = None
+
+    # ---- internals ----
+    def _sorted_entries(self) -> List[Artifact]:
+        if self._sorted is None:
+            self._sorted = sorted(self._entries.values(), key=lambda a: a.mtime, reverse=True)
+        return self._sorted
+
+    @staticmethod
+    def _artifact(name: str, st: os.stat_result) -> Artifact | None:
+        lower = name.lower()
+        if lower.endswith(".pptx"):
+            kind = "certificate"
+        elif lower.endswith(".xlsx"):
+            kind = "tesda" if "tesda" in lower else "excel"
+        else:
+            return None
+        return Artifact(name, kind, st.st_size, st.st_mtime)
+
+
+catalog = Catalog()
+
+
+def page_args(args) -> Tuple[int, int | None]:
+    """`offset`/`limit` (or `page`/`per_page`) query parameters; no limit means everything."""
+    def _int(name):
+        value = args.get(name)
+        if value in (None, ""):
+            return None
+        value = int(value)
+        if value < 0:
+            raise ValueError(f"{name} must not be negative")
+        return value
+
+    limit = _int("limit")
+    offset = _int("offset") or 0
+    per_page = _int("per_page")
+    if per_page:
+        limit = per_page
+        offset = (max(_int("page") or 1, 1) - 1) * per_page
+    return offset, limit
@@ -0,0 +1,188 @@
+# backend/app/services/certificate_renderer.py
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from app.services.pptx_templates import CompiledTemplate, fill_slide, get_template
+
+# Size of the shared render pool; 0 means "one worker per CPU". A request
+# may ask for fewer workers, never more
+RENDER_WORKERS = int(os.getenv("CERT_RENDER_WORKERS", "0"))
+# Workers are started fresh rather than forked from a threaded server process
+RENDER_START_METHOD = os.getenv(
+    "CERT_RENDER_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+# Below this many rows the pool start-up and merge cost more than they save
+PARALLEL_MIN_ROWS = int(os.getenv("CERT_PARALLEL_MIN_ROWS", "200"))
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def resolve_workers(requested: int | None = None) -> int:
+    """The workers a render may use: `requested`, clamped to the pool size."""
+    pool_size = RENDER_WORKERS if RENDER_WORKERS >= 1 else os.cpu_count() or 1
+    if not requested or requested < 1:
+        return pool_size
+    return min(requested, pool_size)
+
+
+def build_deck(compiled: CompiledTemplate, rows: List[Dict[str, Any]],
+               progress: Callable[[int], None] | None = None) -> Tuple[Any, Set[str]]:
+    """Serial path: one filled copy of the template's first slide per row.
+
+    Returns the Presentation and the placeholder keys no row could fill.
+    `progress`, if given, is called with the number of rows done so far.
+    """
+    prs = compiled.open()
+    source_slide = prs.slides[0]
+    unknown = fill_slide(source_slide, rows[0])
+
+    for done, row in enumerate(rows[1:], start=2):
+        new_slide = _add_slide(prs, source_slide.slide_layout, compiled.blueprint.elements)
+        unknown |= fill_slide(new_slide, row)
+        if progress:
+            progress(done)
+
+    return prs, unknown
+
+
+def render_deck(template_path: str, rows: List[Dict[str, Any]], workers: int | None = None,
+                progress: Callable[[int], None] | None = None) -> Tuple[Any, Set[str]]:
+    """Build the certificate deck, sharding rows across a process pool.
+
+    The first row is filled into the template slide here; the remaining rows
+    are split into contiguous shards and each worker builds them into its
+    own partial deck, returning the serialised slide parts. Those are
+    appended to the template in the original row order, so the saved file
+    has the same parts, names and relationships as `build_deck` would give.
+
+    The returned Presentation is meant to be saved only: merged slides are
+    kept as raw parts and are not accessible through `prs.slides`.
+    """
+    compiled = get_template(template_path)
+    workers = min(resolve_workers(workers), len(rows) - 1)
+    if workers <= 1 or len(rows) < PARALLEL_MIN_ROWS:
+        return build_deck(compiled, rows, progress)
+
+    rest = rows[1:]
+    size = -(-len(rest) // workers)
+    shards = [rest[i:i + size] for i in range(0, len(rest), size)]
+    from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+    from pptx.opc.package import Part
+    from pptx.opc.packuri import PackURI
+
+    results = _get_executor().map(_render_shard, [compiled.path] * len(shards), shards)
+
+    prs = compiled.open()
+    source_slide = prs.slides[0]
+    unknown = fill_slide(source_slide, rows[0])
+
+    layout_part = source_slide.slide_layout.part
+    prs_rels = prs.part.rels
+    sldIdLst = prs.slides._sldIdLst
+    next_id = max([255] + [sldId.id for sldId in sldIdLst.sldId_lst]) + 1
+
+    done = 1
+    for blobs, shard_unknown in results:
+        unknown |= shard_unknown
+        for blob in blobs:
+            partname = PackURI("/ppt/slides/slide%d.xml" % (len(sldIdLst) + 1))
+            slide_part = Part(partname, CT.PML_SLIDE, prs.part.package, blob)
+            slide_part.relate_to(layout_part, RT.SLIDE_LAYOUT)
+            # A fresh part can't already be related, so skip the linear
+            # get-or-add scan that makes Slides.add_slide quadratic
+            rId = prs_rels._add_relationship(RT.SLIDE, slide_part)
+            sldIdLst._add_sldId(id=next_id, rId=rId)
+            next_id += 1
+        done += len(blobs)
+        if progress:
+            progress(done)
+
+    return prs, unknown
+
+
+def iter_certificates_zip(template_path: str, rows: List[Dict[str, Any]], names: Iterable[str]) -> Iterator[bytes]:
+    """Yield a ZIP archive holding one single-certificate PPTX per row.
+
+    Each deck is built, saved and written to the archive before the next
+    row is touched, and the archive bytes produced so far are yielded after
+    every entry, so memory stays at one deck and the client starts receiving
+    data right away.
+    """
+    compiled = get_template(template_path)
+    sink = _ZipSink()
+    # the decks are already deflated internally; storing them is much cheaper
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for row, name in zip(rows, names):
+            prs = compiled.open()
+            fill_slide(prs.slides[0], row)
+            buf = io.BytesIO()
+            prs.save(buf)
+            zf.writestr(name, buf.getvalue())
+            yield sink.drain()
+    yield sink.drain()
+
+
+# ---- helpers ----
+class _ZipSink(io.RawIOBase):
+    # Unseekable write target, so zipfile streams entries with data
+    # descriptors instead of seeking back to patch their headers
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _render_shard(template_path: str, rows: List[Dict[str, Any]]) -> Tuple[List[bytes], Set[str]]:
+    # Runs in a worker process; the registry there caches the template too
+    compiled = get_template(template_path)
+    prs = compiled.open()
+    layout = prs.slides[0].slide_layout
+    first_new = len(prs.slides)
+
+    unknown: Set[str] = set()
+    for row in rows:
+        new_slide = _add_slide(prs, layout, compiled.blueprint.elements)
+        unknown |= fill_slide(new_slide, row)
+
+    return [slide.part.blob for slide in list(prs.slides)[first_new:]], unknown
+
+
+def _add_slide(prs, layout, elements):
+    new_slide = prs.slides.add_slide(layout)
+    sp_tree = new_slide.shapes._spTree
+    for shp in list(new_slide.shapes):
+        sp_tree.remove(shp.element)
+    for el in elements:
+        sp_tree.append(deepcopy(el))
+    return new_slide
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    # One pool for every render: a request's worker count only decides how
+    # many shards it submits
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=resolve_workers(),
+                mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+            )
+        return _executor
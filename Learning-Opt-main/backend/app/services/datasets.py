@@ -0,0 +1,135 @@
+# backend/app/services/datasets.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from app.services.uploads import UploadNotFound, UploadStore, uploads
+
+# Rows kept in memory across all cached datasets; the rest are re-read from disk
+DATASET_CACHE_MAX_ROWS = int(os.getenv("DATASET_CACHE_MAX_ROWS", "200000"))
+
+
+class DatasetNotFound(LookupError):
+    """No dataset with that id (never registered, or expired)."""
+
+
+class DatasetRegistry:
+    """Uploaded row sets that generation and preview requests refer to by id.
+
+    The rows live in the upload store (one NDJSON file per dataset), so
+    every worker process sees them and they expire with the store's TTL.
+    Every upload gets its own random id, so appending to or deleting one
+    upload never changes another that happens to hold the same rows; the
+    content hash is reported alongside for callers that want to tell two
+    uploads apart. Parsed rows are kept in an LRU cache bounded by total row
+    count; evicted datasets are simply read back from disk on next use, and
+    a dataset appended to by another worker is noticed by its file version.
+    """
+
+    def __init__(self, store: UploadStore = uploads, max_rows: int = DATASET_CACHE_MAX_ROWS):
+        self.store = store
+        self.max_rows = max_rows
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (version, rows, hash)
+        self._cached_rows = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # ---- public API ----
+    def register(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store `rows` as a new dataset and describe it."""
+        content_hash = self.hash_rows(rows)
+        dataset_id = self.store.create(rows)
+        self._remember(dataset_id, rows, content_hash)
+        return {"dataset_id": dataset_id, "content_hash": content_hash, "rows": len(rows)}
+
+    def append(self, dataset_id: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            self.store.append(dataset_id, rows)
+        except UploadNotFound:
+            raise DatasetNotFound(dataset_id)
+        rows, content_hash = self._load(dataset_id)
+        return {"dataset_id": dataset_id, "content_hash": content_hash, "rows": len(rows)}
+
+    def rows(self, dataset_id: str) -> List[Dict[str, Any]]:
+        """The dataset's rows; treat the returned list as read-only."""
+        return self._load(dataset_id)[0]
+
+    def content_hash(self, dataset_id: str) -> str:
+        return self._load(dataset_id)[1]
+
+    def resolve(self, payload: Dict[str, Any], key: str = "rows") -> List[Dict[str, Any]]:
+        """`payload[key]`, or the rows of `payload["dataset_id"]` when one is given."""
+        dataset_id = (payload or {}).get("dataset_id")
+        if dataset_id:
+            return self.rows(dataset_id)
+        return (payload or {}).get(key) or []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(datasets=len(self._cache), cached_rows=self._cached_rows, max_rows=self.max_rows)
+        return stats
+
+    @staticmethod
+    def hash_rows(rows: List[Dict[str, Any]]) -> str:
+        h = hashlib.sha256()
+        for row in rows:
+            h.update(json.dumps(row, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    # ---- internals ----
+    def _load(self, dataset_id: str):
+        try:
+            version = self.store.version(dataset_id)
+        except UploadNotFound:
+            self._forget(dataset_id)
+            raise DatasetNotFound(dataset_id)
+
+        with self._lock:
+            cached = self._cache.get(dataset_id)
+            if cached and cached[0] == version:
+                self._cache.move_to_end(dataset_id)
+                self._stats["hits"] += 1
+                return cached[1], cached[2]
+            self._stats["misses"] += 1
+
+        try:
+            rows = self.store.rows(dataset_id)
+        except (UploadNotFound, FileNotFoundError):
+            self._forget(dataset_id)
+            raise DatasetNotFound(dataset_id)
+        content_hash = self.hash_rows(rows)
+        self._remember(dataset_id, rows, content_hash, version)
+        return rows, content_hash
+
+    def _remember(self, dataset_id: str, rows: List[Dict[str, Any]], content_hash: str, version=None):
+        if version is None:
+            try:
+                version = self.store.version(dataset_id)
+            except UploadNotFound:
+                return
+        if len(rows) > self.max_rows:
+            return self._forget(dataset_id)
+        with self._lock:
+            old = self._cache.pop(dataset_id, None)
+            if old:
+                self._cached_rows -= len(old[1])
+            self._cache[dataset_id] = (version, rows, content_hash)
+            self._cached_rows += len(rows)
+            while self._cached_rows > self.max_rows:
+                _, (_, evicted, _) = self._cache.popitem(last=False)
+                self._cached_rows -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def _forget(self, dataset_id: str):
+        with self._lock:
+            old = self._cache.pop(dataset_id, None)
+            if old:
+                self._cached_rows -= len(old[1])
+
+
+datasets = DatasetRegistry()
@@ -0,0 +1,214 @@
+# backend/app/services/db.py
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "3306")),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ""),
+    "database": os.getenv("DB_NAME", "creo_certificate"),
+}
+# mysql-connector caps a pool at 32 connections (pooling.CNX_POOL_MAXSIZE)
+POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "10")), 32)
+# How long a request waits for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+
+class ConnectionPool:
+    """The one MySQL connection pool every route checks connections out of.
+
+    mysql-connector's own pool fails immediately when it is empty, so
+    checkouts are gated by a semaphore of the same size: callers wait up
+    to `timeout` seconds for a connection instead. mysql-connector already
+    reconnects a pooled connection that dropped (a server restart or
+    wait_timeout) when it is checked out. Closing the returned connection gives it back to the pool,
+    rolling back whatever the caller left uncommitted.
+    """
+
+    def __init__(self, config: Dict[str, Any] = DB_CONFIG, size: int = POOL_SIZE,
+                 timeout: float = POOL_TIMEOUT):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "exhausted": 0,  # checkouts that found no free connection and had to wait
+            "timeouts": 0,
+            "in_use": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    # ---- public API ----
+    def connection(self, timeout: float | None = None):
+        """Check out a healthy connection, waiting at most `timeout` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._count("exhausted")
+            if not self._slots.acquire(timeout=timeout):
+                self._count("timeouts")
+                raise _pool_timeout()(f"No database connection free after {timeout:g}s (pool size {self.size})")
+
+        try:
+            cnx = self._get_pool().get_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        return _PooledConnection(self, cnx)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats["checkouts"]
+        stats["wait_seconds_avg"] = round(stats["wait_seconds_total"] / checkouts, 6) if checkouts else 0.0
+        stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 6)
+        stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 6)
+        stats["size"] = self.size
+        stats["timeout"] = self.timeout
+        return stats
+
+    def reset(self):
+        """Forget connections inherited from a parent process (call after fork).
+
+        The sockets are shared with the parent, so they are dropped rather
+        than closed; the next checkout opens a fresh pool.
+        """
+        self._lock = threading.Lock()
+        with self._lock:
+            self._pool = None
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._stats["in_use"] = 0
+
+    # ---- internals ----
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from mysql.connector import pooling
+
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name="creo_pool",
+                        pool_size=self.size,
+                        pool_reset_session=True,
+                        **self.config,
+                    )
+                    logger.info(f"MySQL connection pool created ({self.size} connections)")
+        return self._pool
+
+    def _release(self, cnx):
+        try:
+            # Connections are not autocommit (the write paths commit or roll
+            # back themselves), so a read-only caller leaves its snapshot
+            # open; end it so the next checkout does not read stale rows
+            if cnx.in_transaction:
+                cnx.rollback()
+        except Exception as e:
+            logger.warning(f"Rollback on release failed: {e}")
+        try:
+            cnx.close()
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+
+class _PooledConnection:
+    # Behaves like the pooled mysql-connector connection; close() also frees
+    # the checkout slot, and it can be used as a context manager
+    _cnx = None
+
+    def __init__(self, pool: ConnectionPool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def close(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool._release(cnx)
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            from mysql.connector import errors
+
+            raise errors.OperationalError("Connection was returned to the pool")
+        return getattr(self._cnx, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # a route that forgets close() must not leak the slot for good
+        self.close()
+
+
+pool = ConnectionPool()
+
+
+# mysql.connector is only imported once a connection is actually needed;
+# `db.Error` and `db.PoolTimeout` resolve to its exception classes on first use
+def __getattr__(name):
+    if name == "Error":
+        from mysql.connector import Error
+
+        return Error
+    if name == "PoolTimeout":
+        return _pool_timeout()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=None)
+def _pool_timeout():
+    from mysql.connector import errors
+
+    class PoolTimeout(errors.PoolError):
+        """No connection became free within the pool timeout."""
+
+    PoolTimeout.__module__ = __name__
+    PoolTimeout.__qualname__ = "PoolTimeout"
+    return PoolTimeout
+
+
+def get_connection(timeout: float | None = None):
+    return pool.connection(timeout)
+
+
+def execute_query(query, params=None):
+    with get_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            if query.strip().lower().startswith("select"):
+                return cursor.fetchall()
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
@@ -1,20 +1,83 @@
 # backend/app/services/excel_filler.py
-import io, os, re
+import io, os, re, threading
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
 
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.worksheet.worksheet import Worksheet
+if TYPE_CHECKING:
+    import pandas as pd
+    from openpyxl.worksheet.worksheet import Worksheet
 
 PLACEHOLDER_RE = re.compile(r"\{([^}]+)\}")
 
+class PlaceholderCell:
+    """A template cell holding `{KEY}` placeholders, pre-split for filling.
+
+    `parts` is the `PLACEHOLDER_RE.split` of the cell text (literals at even
+    indexes, keys at odd ones) and `context` the YEAR LAST ATTENDED level the
+    cell belongs to, if any.
+    """
+    __slots__ = ("row", "column", "parts", "context")
+
+    def __init__(self, row: int, column: int, parts: List[str], context: str | None):
+        self.row = row
+        self.column = column
+        self.parts = parts
+        self.context = context
+
+def scan_placeholders(ws: "Worksheet") -> List[PlaceholderCell]:
+    """Walk the sheet once and return every cell that has placeholders."""
+    cells = []
+    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
+        for cell in row:
+            if isinstance(cell.value, str) and "{" in cell.value and "}" in cell.value:
+                parts = PLACEHOLDER_RE.split(cell.value)
+                if len(parts) > 1:
+                    cells.append(PlaceholderCell(cell.row, cell.column, parts, _year_context(cell.value)))
+    return cells
+
+def fill_placeholders(ws: "Worksheet", cells: List[PlaceholderCell], mapping: Dict[str, Any], rowdict: Dict[str, Any]):
+    """Write `rowdict` into the pre-scanned placeholder cells of a template copy."""
+    for pc in cells:
+        out = [pc.parts[0]]
+        for i in range(1, len(pc.parts), 2):
+            out.append(_lookup(pc.parts[i], pc.context, mapping, rowdict))
+            out.append(pc.parts[i + 1])
+        ws.cell(row=pc.row, column=pc.column).value = "".join(out)
+
+def _year_context(text: str) -> str | None:
+    up = text.upper()
+    if "YEAR LAST ATTENDED" in up:
+        if "ELEMENTARY" in up: return "ELEMENTARY"
+        if "SECONDARY" in up: return "SECONDARY"
+        if "TERTIARY" in up: return "TERTIARY"
+    return None
+
+def _lookup(key: str, context: str | None, mapping: Dict[str, Any], rowdict: Dict[str, Any]) -> str:
+    mp = mapping.get(key, key)
+    col = (mp.get(context) or mp.get("DEFAULT")) if isinstance(mp, dict) else mp
+    val = rowdict.get(col, "")
+    return "" if val is None else str(val)
+
+# Placeholder layout per template file, keyed by (path, mtime, size)
+_scan_cache: Dict[Tuple[str, int, int], List[PlaceholderCell]] = {}
+_scan_lock = threading.Lock()
+
+# How a grades row is picked when several share the trainee's name
+DUPLICATE_POLICIES = ("first", "last", "error")
+
 class ExcelTemplateFiller:
-    def __init__(self, template_path: str, default_mapping: Dict[str, Any] | None = None):
+    def __init__(self, template_path: str, default_mapping: Dict[str, Any] | None = None,
+                 duplicate_policy: str = "first"):
+        if duplicate_policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"duplicate_policy must be one of {', '.join(DUPLICATE_POLICIES)}")
         self.template_path = template_path
         self.default_mapping = default_mapping or {}
+        self.duplicate_policy = duplicate_policy
+        # matched / unmatched / duplicates of the last grades join
+        self.join_stats: Dict[str, Any] = {}
 
-    def generate_from_filestorage(self, file_storage, mapping_json: str | None = None) -> Tuple[io.BytesIO, str]:
+    def generate_from_filestorage(self, file_storage, mapping_json: str | None = None,
+                                  progress: Callable[[int, int], None] | None = None) -> Tuple[io.BytesIO, str]:
         mapping = self._merge_mapping(mapping_json)
         xl = self._read_uploaded_excel(file_storage)
         if len(xl) < 2:
@@ -27,28 +90,42 @@ class ExcelTemplateFiller:
         if df_details.empty:
             raise ValueError("Details sheet has no rows.")
 
-        wb, template_ws = self._load_template(self.template_path)
-
-        used_titles = set()
-        for idx, row in df_details.iterrows():
-            row_dict = row.to_dict()
-            name_key = next((k for k in mapping.keys() if k.upper() == "NAME"), "NAME")
-            col_for_name = mapping.get(name_key, name_key)
-            candidate_name = row_dict.get(col_for_name, f"Row {idx+1}")
-            new_title = self._safe_sheet_title(str(candidate_name), used_titles)
-
-            ws_copy = self._copy_template_sheet_with_fallback(wb, template_ws, new_title)
-
-            matched_grades = df_grades[df_grades[col_for_name] == candidate_name]
-            grade_row = matched_grades.iloc[0].to_dict() if not matched_grades.empty else {}
-            combined_row = {**row_dict, **grade_row}
-            self._replace_placeholders_in_worksheet(ws_copy, mapping, combined_row)
-
-        wb.remove(template_ws)
+        name_key = next((k for k in mapping.keys() if k.upper() == "NAME"), "NAME")
+        col_for_name = mapping.get(name_key, name_key)
+        grades_by_name, duplicates = self._index_grades(df_grades, col_for_name)
+        counts = {"matched": 0, "unmatched": 0}
+
+        def entries():
+            used_titles = set()
+            for idx, row_dict in enumerate(df_details.to_dict("records")):
+                candidate_name = row_dict.get(col_for_name, f"Row {idx+1}")
+                new_title = self._safe_sheet_title(str(candidate_name), used_titles)
+
+                grade_row = grades_by_name.get(candidate_name)
+                if grade_row is None:
+                    counts["unmatched"] += 1
+                    grade_row = {}
+                else:
+                    counts["matched"] += 1
+                yield new_title, {**row_dict, **grade_row}
+                if progress:
+                    progress(idx + 1, len(df_details))
 
         out = io.BytesIO()
-        wb.save(out)
+        template = self._streaming_template(self.template_path)
+        if template is not None:
+            template.write(out, entries(), mapping)
+        else:
+            self._write_with_openpyxl(out, entries(), mapping)
         out.seek(0)
+
+        self.join_stats = {
+            **counts,
+            "duplicates": len(duplicates),
+            "duplicate_names": sorted(duplicates),
+            "duplicate_policy": self.duplicate_policy,
+        }
+
         out_name = f"filled_multi_sheets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         return out, out_name
 
@@ -61,39 +138,72 @@ class ExcelTemplateFiller:
         return mapping
 
     def _read_uploaded_excel(self, file_storage):
+        import pandas as pd
+
         xl = pd.read_excel(file_storage, sheet_name=None, dtype=str)
         return {k: v.fillna("") for k, v in xl.items()}
 
+    def _index_grades(self, df_grades: "pd.DataFrame", col_for_name: str):
+        """Map each name in the grades sheet to its row, applying the duplicate policy."""
+        if col_for_name not in df_grades.columns:
+            raise ValueError(f"Grades sheet has no '{col_for_name}' column.")
+
+        index: Dict[Any, Dict[str, Any]] = {}
+        duplicates = set()
+        for rec in df_grades.to_dict("records"):
+            key = rec[col_for_name]
+            if key in index:
+                duplicates.add(key)
+                if self.duplicate_policy != "last":
+                    continue
+            index[key] = rec
+
+        if duplicates and self.duplicate_policy == "error":
+            raise ValueError(f"Duplicate names in grades sheet: {', '.join(sorted(map(str, duplicates)))}")
+        return index, duplicates
+
+    def _streaming_template(self, template_path: str):
+        # Write-only output keeps memory at one sheet; templates it can't
+        # copy faithfully go through openpyxl instead
+        from app.services.xlsx_stream import UnsupportedTemplate, get_streaming_template
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"Template not found on server: {template_path}")
+        try:
+            return get_streaming_template(template_path)
+        except UnsupportedTemplate:
+            return None
+
+    def _write_with_openpyxl(self, out, entries, mapping: Dict[str, Any]):
+        wb, template_ws = self._load_template(self.template_path)
+        placeholder_cells = self._placeholder_cells(self.template_path, template_ws)
+        for new_title, combined_row in entries:
+            ws_copy = self._copy_template_sheet_with_fallback(wb, template_ws, new_title)
+            fill_placeholders(ws_copy, placeholder_cells, mapping, combined_row)
+        wb.remove(template_ws)
+        wb.save(out)
+
     def _load_template(self, template_path: str):
         if not os.path.exists(template_path):
             raise FileNotFoundError(f"Template not found on server: {template_path}")
+        from openpyxl import load_workbook
+
         wb = load_workbook(template_path, data_only=True)
         if not wb.worksheets:
             raise RuntimeError("Template has no worksheets.")
         return wb, wb.worksheets[0]
 
-    def _replace_placeholders_in_worksheet(self, ws: Worksheet, mapping: Dict[str, Any], rowdict: Dict[str, Any]):
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                if isinstance(cell.value, str) and "{" in cell.value and "}" in cell.value:
-                    cell.value = self._replace_placeholders_in_cell(cell.value, mapping, rowdict)
-
-    def _replace_placeholders_in_cell(self, text: str, mapping: Dict[str, Any], rowdict: Dict[str, Any]) -> str:
-        context = None
-        up = text.upper()
-        if "YEAR LAST ATTENDED" in up:
-            if "ELEMENTARY" in up: context = "ELEMENTARY"
-            elif "SECONDARY" in up: context = "SECONDARY"
-            elif "TERTIARY" in up: context = "TERTIARY"
-
-        def repl(m):
-            key = m.group(1)
-            mp = mapping.get(key, key)
-            col = (mp.get(context) or mp.get("DEFAULT")) if isinstance(mp, dict) else mp
-            val = rowdict.get(col, "")
-            return "" if val is None else str(val)
-
-        return PLACEHOLDER_RE.sub(repl, text)
+    def _placeholder_cells(self, template_path: str, template_ws: "Worksheet") -> List[PlaceholderCell]:
+        # Every trainee sheet is a copy of the template, so the grid is
+        # scanned once per template version rather than once per copy
+        st = os.stat(template_path)
+        key = (os.path.abspath(template_path), st.st_mtime_ns, st.st_size)
+        with _scan_lock:
+            cells = _scan_cache.get(key)
+            if cells is None:
+                for stale in [k for k in _scan_cache if k[0] == key[0]]:
+                    del _scan_cache[stale]
+                cells = _scan_cache[key] = scan_placeholders(template_ws)
+        return cells
 
     def _safe_sheet_title(self, s: str, used: set) -> str:
         title = (s or "").strip() or "Row"
@@ -0,0 +1,222 @@
+# backend/app/services/generation.py
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from app.services.catalog import catalog
+from app.services.certificate_renderer import render_deck
+from app.services.datasets import DatasetNotFound, datasets
+from app.services.excel_filler import fill_placeholders, scan_placeholders
+from app.services.jobs import DONE, jobs
+from app.services.storage import storage
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "uploads", "templates")
+
+# Optional remote-worker mode: when set, the /api/generate-* routes forward
+# to the generator endpoints of this base URL instead of running in-process
+REMOTE_WORKER_URL = os.getenv("GENERATION_REMOTE_URL", "").rstrip("/")
+REMOTE_TIMEOUT = float(os.getenv("GENERATION_REMOTE_TIMEOUT", "300"))
+
+
+class GenerationError(Exception):
+    """A generation request that can't be served; `status` is the HTTP code to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# ---- TESDA workbooks ----
+def submit_tesda(data: Dict[str, Any]) -> str:
+    """Validate a `{"template", "data" | "dataset_id"}` payload and queue the workbook job."""
+    data = data or {}
+    template_name = data.get("template")
+    entries = resolve_rows(data, "data")
+
+    if not template_name or not entries:
+        raise GenerationError("Missing template or data")
+
+    template_path = os.path.join(TEMPLATE_DIR, template_name)
+    if not os.path.exists(template_path):
+        raise GenerationError("Template not found", 404)
+
+    return jobs.submit("tesda", tesda_job, template_path, entries, total=len(entries))
+
+
+def tesda_job(ctx, template_path: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return render_tesda_file(template_path, entries, progress=ctx.progress)
+
+
+def render_tesda_file(template_path: str, entries: List[Dict[str, Any]],
+                      progress: Callable[[int], None] | None = None) -> Dict[str, Any]:
+    """Write one filled copy of the template's active sheet per entry."""
+    used_titles = set()
+    titled = [
+        (safe_sheet_title(entry.get("Name", f"Sheet{idx+1}"), used_titles), entry)
+        for idx, entry in enumerate(entries)
+    ]
+
+    # Same-minute runs get a " (2)"... suffix from the store instead of overwriting each other
+    filename = f"TESDA_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.xlsx"
+    filename = storage.put(filename, lambda path: _write_tesda(path, template_path, titled, progress))
+    catalog.touch(filename)
+    return {"files": [filename], "artifact": filename, "path": storage.local_path(filename), "filename": filename}
+
+
+def _write_tesda(output_path: str, template_path: str, titled: List[tuple],
+                 progress: Callable[[int], None] | None):
+    # Imported here: the streaming writer pulls in lxml, which only the
+    # TESDA job needs
+    from app.services.xlsx_stream import UnsupportedTemplate, get_streaming_template
+
+    try:
+        # Sheets are streamed into the file one at a time
+        get_streaming_template(template_path, sheet="active").write(output_path, titled, progress=progress)
+    except UnsupportedTemplate:
+        from openpyxl import load_workbook
+
+        base_wb = load_workbook(template_path)
+        template_ws = base_wb.active
+
+        # Placeholder cells are found once; each copy only gets those cells written
+        placeholder_cells = scan_placeholders(template_ws)
+
+        for idx, (new_title, entry) in enumerate(titled):
+            ws_copy = copy_template_sheet_with_fallback(base_wb, template_ws, new_title)
+            fill_placeholders(ws_copy, placeholder_cells, {}, entry)
+            if progress:
+                progress(idx + 1)
+
+        base_wb.remove(template_ws)
+        base_wb.save(output_path)
+
+
+# ---- certificate decks ----
+def submit_certificates(data: Dict[str, Any], timestamp: str | None = None) -> str:
+    """Validate a `{"template", "rows" | "dataset_id", "workers"}` payload and queue the deck job."""
+    data = data or {}
+    template_type = data.get("template", "ojt")
+    rows = resolve_rows(data, "rows")
+
+    if not rows:
+        raise GenerationError("No data provided")
+
+    template_path = certificate_template_path(template_type)
+
+    try:
+        workers = int(data["workers"]) if data.get("workers") else None
+    except (TypeError, ValueError):
+        raise GenerationError("workers must be an integer")
+
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d_%H-%M")
+    return jobs.submit(
+        "certificates", certificates_job,
+        template_path, template_type, rows, workers, timestamp,
+        total=len(rows),
+    )
+
+
+def certificate_template_path(template_type: str) -> str:
+    tpl_filename = f"{template_type}.pptx"
+    template_path = os.path.join(TEMPLATE_DIR, tpl_filename)
+    if not os.path.exists(template_path):
+        raise GenerationError(f"Template '{tpl_filename}' not found", 404)
+    return template_path
+
+
+def certificates_job(ctx, template_path: str, template_type: str, rows: List[Dict[str, Any]],
+                     workers: int | None, timestamp: str) -> Dict[str, Any]:
+    # Large cohorts are sharded across a process pool; small ones render
+    # serially from the cached template
+    prs, unknown = render_deck(template_path, rows, workers=workers, progress=ctx.progress)
+
+    output_name = storage.put(f"certificate_{template_type} ({timestamp}).pptx", prs.save)
+    catalog.touch(output_name)
+
+    return {
+        "files": [output_name],
+        "unknown_placeholders": sorted(unknown),
+        "artifact": output_name,
+        "path": storage.local_path(output_name),
+        "filename": output_name,
+    }
+
+
+# ---- synchronous entry points ----
+def generate(kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a TESDA (`kind="tesda"`) or certificate generation to completion.
+
+    In-process by default; with GENERATION_REMOTE_URL set the request is
+    forwarded to that worker's generator endpoint instead. Returns the job
+    result (at least `files`) or raises GenerationError.
+    """
+    if REMOTE_WORKER_URL:
+        # the remote worker has its own dataset registry, so send the rows themselves
+        if (data or {}).get("dataset_id"):
+            key = "data" if kind == "tesda" else "rows"
+            rows = resolve_rows(data, key)
+            data = {k: v for k, v in data.items() if k != "dataset_id"}
+            data[key] = rows
+        return _forward(kind, data)
+
+    submit = submit_tesda if kind == "tesda" else submit_certificates
+    job = jobs.wait(submit(data))
+    if job["status"] != DONE:
+        raise GenerationError(job["error"] or f"Failed to generate {kind}", 500)
+    return job["result"]
+
+
+def resolve_rows(data: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+    """The payload's `key` rows, or those of its `dataset_id`."""
+    try:
+        return datasets.resolve(data, key)
+    except DatasetNotFound:
+        raise GenerationError("Dataset not found or expired", 404)
+
+
+def safe_sheet_title(s: str, used: set) -> str:
+    title = (s or "").strip() or "Row"
+    for ch in '[]:*?/\\':
+        title = title.replace(ch, "-")
+    title = title[:31] or "Row"
+    orig = title
+    i = 2
+    while title in used:
+        suffix = f" ({i})"
+        title = (orig[: 31 - len(suffix)] + suffix) if len(orig) + len(suffix) > 31 else orig + suffix
+        i += 1
+    used.add(title)
+    return title
+
+
+def copy_template_sheet_with_fallback(wb, template_ws, new_title):
+    try:
+        ws_copy = wb.copy_worksheet(template_ws)
+        ws_copy.title = new_title
+        return ws_copy
+    except Exception as e:
+        print("[WARN] copy_worksheet failed; falling back to manual copy:", repr(e))
+        ws = wb.create_sheet(title=new_title)
+        for rng in template_ws.merged_cells.ranges:
+            ws.merge_cells(str(rng))
+        for r in range(1, template_ws.max_row + 1):
+            for c in range(1, template_ws.max_column + 1):
+                v = template_ws.cell(row=r, column=c).value
+                if v is not None:
+                    ws.cell(row=r, column=c, value=v)
+        return ws
+
+
+# ---- helpers ----
+def _forward(kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    import requests
+
+    path = "/generate/tesda" if kind == "tesda" else "/generate/certificates"
+    try:
+        response = requests.post(REMOTE_WORKER_URL + path, json=data, timeout=REMOTE_TIMEOUT)
+    except requests.RequestException as e:
+        raise GenerationError(f"Remote generator unavailable: {e}", 502)
+    if response.status_code != 200:
+        raise GenerationError(f"Failed to generate {kind}", 500)
+    return response.json()
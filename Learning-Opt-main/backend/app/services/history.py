@@ -0,0 +1,169 @@
+# backend/app/services/history.py
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HISTORY_DB = os.getenv("HISTORY_DB", os.path.join(BASE_DIR, "instance", "history.sqlite3"))
+HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "500"))
+# Trimming the table to capacity is batched over this many inserts
+_TRIM_EVERY = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO history_version (id, version) VALUES (1, 0);
+"""
+
+
+class DownloadHistory:
+    """Most recent generated/downloaded files, newest first, one entry per filename.
+
+    SQLite is the shared store, so every worker process sees the same
+    history and it survives restarts; the UNIQUE filename index makes
+    inserts and duplicate checks O(1) and the table is trimmed back to
+    `capacity` rows. Each process keeps the last `capacity` entries in a
+    bounded ring keyed by filename (an OrderedDict, oldest first, so
+    insert, dedup and eviction are all O(1)) and only reloads it when the
+    store's version counter shows that some other process wrote to it.
+    """
+
+    def __init__(self, path: str = HISTORY_DB, capacity: int = HISTORY_MAX_ENTRIES):
+        self.path = path
+        self.capacity = capacity
+        self._ring: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._version = -1
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._initialised = False
+
+    # ---- public API ----
+    def add(self, entry: Dict[str, Any], replace: bool = True) -> bool:
+        """Record `entry` (must have a `filename`).
+
+        With `replace` an existing entry for the same file is dropped and the
+        new one goes to the front; otherwise the call is a no-op for a file
+        that is already listed. Returns whether anything was written.
+        """
+        entry = dict(entry)
+        entry.setdefault("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        filename = entry["filename"]
+
+        with self._lock:
+            self._sync()
+            if not replace and filename in self._ring:
+                return False
+            with self._connect() as conn:
+                if replace:
+                    conn.execute("DELETE FROM history WHERE filename = ?", (filename,))
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO history (filename, entry) VALUES (?, ?)",
+                    (filename, json.dumps(entry, default=str)),
+                )
+                if cur.rowcount == 0:
+                    # another worker recorded it since our last sync
+                    self._version = -1
+                    return False
+                self._inserts += 1
+                if self._inserts % _TRIM_EVERY == 0:
+                    conn.execute(
+                        "DELETE FROM history WHERE seq <= "
+                        "(SELECT seq FROM history ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                        (self.capacity,),
+                    )
+                version = self._bump(conn)
+
+            if version == self._version + 1:
+                self._push(entry)
+                self._version = version
+            else:
+                self._version = -1
+            return True
+
+    def remove(self, filename: str):
+        with self._lock:
+            with self._connect() as conn:
+                if conn.execute("DELETE FROM history WHERE filename = ?", (filename,)).rowcount:
+                    self._bump(conn)
+            self._version = -1
+
+    def contains(self, filename: str) -> bool:
+        with self._lock:
+            self._sync()
+            return filename in self._ring
+
+    def recent(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            items = list(reversed(self._ring.values()))
+        return items[:limit] if limit is not None else items
+
+    # ---- internals ----
+    def _push(self, entry: Dict[str, Any]):
+        self._ring.pop(entry["filename"], None)
+        self._ring[entry["filename"]] = entry
+        while len(self._ring) > self.capacity:
+            self._ring.popitem(last=False)
+
+    def _sync(self):
+        # one indexed read per call; the ring is rebuilt only after foreign writes
+        with self._connect(write=False) as conn:
+            version = conn.execute("SELECT version FROM history_version WHERE id = 1").fetchone()[0]
+            if version == self._version:
+                return
+            rows = conn.execute(
+                "SELECT entry FROM history ORDER BY seq DESC LIMIT ?", (self.capacity,)
+            ).fetchall()
+        entries = (json.loads(r[0]) for r in reversed(rows))
+        self._ring = OrderedDict((e["filename"], e) for e in entries)
+        self._version = version
+
+    def _bump(self, conn) -> int:
+        conn.execute("UPDATE history_version SET version = version + 1 WHERE id = 1")
+        return conn.execute("SELECT version FROM history_version WHERE id = 1").fetchone()[0]
+
+    def _connect(self, write: bool = True):
+        self._init()
+        return _Transaction(self.path, write)
+
+    def _init(self):
+        if self._initialised:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._initialised = True
+
+
+class _Transaction:
+    # One short-lived connection per operation, committed (or rolled back)
+    # and closed on exit; BEGIN IMMEDIATE serialises writers across processes
+    def __init__(self, path: str, write: bool = True):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.write = write
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE" if self.write else "BEGIN")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.conn.close()
+
+
+history = DownloadHistory()
@@ -0,0 +1,203 @@
+# backend/app/services/jobs.py
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(BASE_DIR, "instance", "jobs"))
+# Every synchronous request waits on one of these, so by default there are as
+# many as the server has request threads (gunicorn.conf.py's GUNICORN_THREADS)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", os.getenv("GUNICORN_THREADS", "4")))
+# Finished jobs (and their output files) are kept this long for download
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+PROGRESS_INTERVAL = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class JobContext:
+    """Handed to a job function: where to write output and how to report progress."""
+
+    def __init__(self, manager: "JobManager", job_id: str, total: int):
+        self.manager = manager
+        self.job_id = job_id
+        self.total = total
+        self.work_dir = os.path.join(manager.jobs_dir, job_id)
+        self._last_write = 0.0
+
+    def progress(self, done: int, total: int | None = None):
+        if total is not None:
+            self.total = total
+        # per-row callers would otherwise turn every row into a SQLite write
+        now = time.monotonic()
+        if done < self.total and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        self.manager._update(self.job_id, done=done, total=self.total)
+
+
+class JobManager:
+    """Runs long generation work on a local thread pool.
+
+    Job state lives in a SQLite table next to the job output folders so that
+    any worker process can answer progress and download requests. A job
+    function is called as `func(ctx, *args, **kwargs)` and returns a dict
+    that is stored as the job result; if it contains a `path` key, that file
+    is what the download endpoint serves.
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR, workers: int = JOB_WORKERS):
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.db_path = os.path.join(jobs_dir, "jobs.sqlite3")
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._initialised = False
+
+    # ---- public API ----
+    def submit(self, kind: str, func: Callable[..., Dict[str, Any]], *args, total: int = 0, **kwargs) -> str:
+        self._init()
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, done, total, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, total, os.getpid(), now, now),
+            )
+        ctx = JobContext(self, job_id, total)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._futures[job_id] = self._executor.submit(self._run, ctx, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        self._init()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+
+        # A job left queued/running by a process that no longer exists will never finish
+        if job["status"] in (QUEUED, RUNNING) and not _pid_alive(job["owner_pid"]):
+            self._update(job_id, status=FAILED, error="Job was interrupted by a server restart")
+            return self.get(job_id)
+        return job
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Dict[str, Any] | None:
+        """Block until the job finishes (used by the synchronous route wrappers)."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.exception(timeout=timeout)
+        return self.get(job_id)
+
+    def cleanup(self, ttl: int = JOB_TTL_SECONDS):
+        """Forget finished jobs older than `ttl` seconds and remove their output."""
+        self._init()
+        cutoff = time.time() - ttl
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            ).fetchall()
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(r["id"],) for r in rows])
+        for r in rows:
+            shutil.rmtree(os.path.join(self.jobs_dir, r["id"]), ignore_errors=True)
+
+    # ---- internals ----
+    def _run(self, ctx: JobContext, func, args, kwargs):
+        self._update(ctx.job_id, status=RUNNING)
+        try:
+            os.makedirs(ctx.work_dir, exist_ok=True)
+            result = func(ctx, *args, **kwargs) or {}
+            self._update(ctx.job_id, status=DONE, done=ctx.total, total=ctx.total, result=json.dumps(result))
+        except Exception as e:
+            traceback.print_exc()
+            self._update(ctx.job_id, status=FAILED, error=str(e))
+        finally:
+            # the state is in SQLite now; waiters that miss the future read it from there
+            with self._lock:
+                self._futures.pop(ctx.job_id, None)
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return _closing(conn)
+
+    def _init(self):
+        if self._initialised:
+            return
+        with self._lock:
+            if self._initialised:
+                return
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+            self._initialised = True
+
+
+class _closing:
+    # sqlite3's own context manager commits but never closes the connection
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    # os.kill(pid, 0) would terminate the process on Windows
+    if pid == os.getpid() or os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+jobs = JobManager()
@@ -0,0 +1,305 @@
+# backend/app/services/migrations.py
+"""Versioned schema for the tables the backend owns.
+
+Each file in sql/migrations is one version, `NNNN_description.sql`, applied
+in order and recorded in `schema_migrations` with a checksum of its text:
+
+    python -m app.services.migrations status
+    python -m app.services.migrations up [--to N] [--dry-run]
+    python -m app.services.migrations check [--json]   # for CI: fails on a scan
+
+MySQL commits each DDL statement on its own, so a migration is not atomic.
+Statements that fail only because their change is already there (a column,
+index or key that exists) are skipped, so an interrupted run, or a schema
+that was created by hand before it was versioned, can simply be migrated
+again.
+
+`check` runs EXPLAIN over the hot queries and fails when one of them no
+longer reads through its index.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Dict, List, NamedTuple
+
+from app.services import db
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MIGRATIONS_DIR = os.getenv("MIGRATIONS_DIR", os.path.join(BASE_DIR, "..", "sql", "migrations"))
+# Below this many rows the optimizer may rightly prefer a scan, so check()
+# only reports it; the tables are checked for real once they hold data
+INDEX_CHECK_MIN_ROWS = int(os.getenv("INDEX_CHECK_MIN_ROWS", "1000"))
+
+# "Already there": duplicate table, column, key name, foreign key name (MySQL)
+_ALREADY_APPLIED = {1050, 1060, 1061, 1826}
+_FILE_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+_NO_SUCH_TABLE = 1146
+# Versions seen applied by is_applied(); a migration is never taken back
+_seen_applied: set = set()
+
+_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS `schema_migrations` (
+  `version` int(11) NOT NULL,
+  `name` varchar(255) NOT NULL,
+  `checksum` char(64) NOT NULL,
+  `applied_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    @property
+    def checksum(self) -> str:
+        with open(self.path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def statements(self) -> List[str]:
+        with open(self.path, encoding="utf-8") as f:
+            return split_statements(f.read())
+
+
+class HotQuery(NamedTuple):
+    name: str
+    sql: str
+    params: tuple
+    table: str
+    indexes: tuple  # any of these satisfies the check
+    no_filesort: bool = False
+
+
+# The lookups every request path depends on, with the index each must use
+HOT_QUERIES = (
+    HotQuery("file_details", "SELECT * FROM generated_files WHERE id = %s AND status = 'active'",
+             (1,), "generated_files", ("PRIMARY",)),
+    HotQuery("file_students", "SELECT * FROM generated_file_students WHERE file_id = %s "
+             "ORDER BY last_name, first_name", (1,), "generated_file_students", ("idx_gfs_file", "fk_gfs_file")),
+    HotQuery("download_version", "SELECT COUNT(*) AS n, MAX(updated_at) AS latest "
+             "FROM generated_file_students WHERE file_id = %s", (1,), "generated_file_students",
+             ("idx_gfs_file", "fk_gfs_file")),
+    HotQuery("listing", "SELECT * FROM generated_files WHERE status = 'active' "
+             "ORDER BY created_at DESC, id DESC LIMIT %s", (51,), "generated_files",
+             ("idx_gf_status_created",), no_filesort=True),
+    HotQuery("listing_by_batch", "SELECT * FROM generated_files WHERE status = 'active' AND batch = %s "
+             "ORDER BY created_at DESC, id DESC LIMIT %s", ("", 51), "generated_files",
+             ("idx_gf_status_batch_created",), no_filesort=True),
+    HotQuery("listing_by_school", "SELECT * FROM generated_files WHERE status = 'active' AND school = %s "
+             "ORDER BY created_at DESC, id DESC LIMIT %s", ("", 51), "generated_files",
+             ("idx_gf_status_school_created",), no_filesort=True),
+    HotQuery("cleanup_candidates", "SELECT id, filename, file_path, file_size FROM generated_files "
+             "WHERE status = 'deleted'", (), "generated_files",
+             ("idx_gf_status_created", "idx_gf_status_batch_created", "idx_gf_status_school_created")),
+)
+
+
+# ---- public API ----
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILE_RE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def status(connection, directory: str = MIGRATIONS_DIR) -> List[Dict[str, Any]]:
+    """Every known migration with its state: applied, pending or modified."""
+    applied = _applied(connection)
+    rows = []
+    for migration in discover(directory):
+        record = applied.get(migration.version)
+        if record is None:
+            state = "pending"
+        elif record["checksum"] != migration.checksum:
+            state = "modified"
+        else:
+            state = "applied"
+        rows.append({
+            "version": migration.version,
+            "name": migration.name,
+            "state": state,
+            "applied_at": record["applied_at"].isoformat() if record else None,
+        })
+    return rows
+
+
+def migrate(connection, target: int | None = None, dry_run: bool = False,
+            directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Apply the pending migrations up to `target` (all by default), in order."""
+    applied = _applied(connection)
+    pending = [m for m in discover(directory)
+               if m.version not in applied and (target is None or m.version <= target)]
+    for migration in pending:
+        if dry_run:
+            logger.info(f"Would apply {migration.version:04d}_{migration.name}")
+            continue
+        logger.info(f"Applying {migration.version:04d}_{migration.name}")
+        _apply(connection, migration)
+    return pending
+
+
+def check_indexes(connection, min_rows: int = INDEX_CHECK_MIN_ROWS) -> List[Dict[str, Any]]:
+    """EXPLAIN every hot query; `ok` is False where it stopped using its index."""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        results = []
+        for query in HOT_QUERIES:
+            cursor.execute("EXPLAIN " + query.sql, query.params)
+            plan = [row for row in cursor.fetchall() if row.get("table") == query.table]
+            results.append(_judge(query, plan, min_rows))
+        return results
+    finally:
+        cursor.close()
+
+
+def is_applied(connection, version: int) -> bool:
+    """Whether `version` is recorded as applied, for code that needs its schema.
+
+    Cheap enough to ask per request: a version seen applied is remembered,
+    and until then it is one primary-key lookup (no DDL, so an open
+    transaction is left alone).
+    """
+    if version in _seen_applied:
+        return True
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+        applied = cursor.fetchone() is not None
+    except db.Error as e:
+        if getattr(e, "errno", None) != _NO_SUCH_TABLE:
+            raise
+        applied = False
+    finally:
+        cursor.close()
+    if applied:
+        _seen_applied.add(version)
+    return applied
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration into statements: `--` comments out, `;` at line end."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            statements.append("\n".join(current).rstrip().rstrip(";"))
+            current = []
+    if current:
+        statements.append("\n".join(current))
+    return statements
+
+
+# ---- internals ----
+def _applied(connection) -> Dict[int, Dict[str, Any]]:
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(_VERSION_TABLE)
+        cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations")
+        return {row["version"]: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def _apply(connection, migration: Migration):
+    cursor = connection.cursor()
+    try:
+        for statement in migration.statements():
+            try:
+                cursor.execute(statement)
+            except db.Error as e:
+                if not _already_applied(e):
+                    connection.rollback()
+                    raise RuntimeError(f"Migration {migration.version:04d} failed: {e}\n{statement}") from e
+                logger.info(f"  already applied: {e.msg}")
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (migration.version, migration.name, migration.checksum),
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def _already_applied(error) -> bool:
+    # MariaDB reports a duplicate foreign key name as "Can't create table
+    # (errno: 121 ...)", which is otherwise a genuine failure
+    errno = getattr(error, "errno", None)
+    return errno in _ALREADY_APPLIED or (errno == 1005 and "errno: 121" in str(error))
+
+
+def _judge(query: HotQuery, plan: List[Dict[str, Any]], min_rows: int) -> Dict[str, Any]:
+    result = {"query": query.name, "table": query.table, "expected": list(query.indexes)}
+    if not plan:
+        # e.g. "Impossible WHERE" or "no matching row in const table": nothing to read
+        return {**result, "ok": True, "key": None, "rows": 0, "note": "no table access"}
+
+    row = plan[0]
+    key = row.get("key")
+    rows = int(row.get("rows") or 0)
+    extra = row.get("Extra") or ""
+    problems = []
+    if key not in query.indexes:
+        problems.append(f"uses {key or 'no index'} ({row.get('type')})")
+    if query.no_filesort and "filesort" in extra:
+        problems.append("sorts instead of reading in index order")
+
+    result.update(key=key, rows=rows, type=row.get("type"), extra=extra)
+    if problems and rows < min_rows:
+        return {**result, "ok": True, "note": f"{'; '.join(problems)}; ignored below {min_rows} rows"}
+    return {**result, "ok": not problems, "note": "; ".join(problems) or None}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Schema migrations and index checks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list migrations and whether they are applied")
+    up = sub.add_parser("up", help="apply pending migrations")
+    up.add_argument("--to", type=int, help="stop after this version")
+    up.add_argument("--dry-run", action="store_true", help="only list what would be applied")
+    check = sub.add_parser("check", help="fail if a hot query no longer uses its index")
+    check.add_argument("--min-rows", type=int, default=INDEX_CHECK_MIN_ROWS,
+                       help="tables estimated smaller than this only warn")
+    check.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with db.get_connection() as connection:
+        if args.command == "status":
+            for row in status(connection):
+                print(f"{row['version']:04d}  {row['state']:<8}  {row['name']}"
+                      + (f"  ({row['applied_at']})" if row["applied_at"] else ""))
+            return 0
+
+        if args.command == "up":
+            applied = migrate(connection, target=args.to, dry_run=args.dry_run)
+            print(f"{len(applied)} migration(s) {'pending' if args.dry_run else 'applied'}")
+            return 0
+
+        results = check_indexes(connection, min_rows=args.min_rows)
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+    else:
+        for r in results:
+            print(f"{'ok  ' if r['ok'] else 'FAIL'}  {r['query']:<20} key={r['key']}  rows={r['rows']}"
+                  + (f"  {r['note']}" if r.get("note") else ""))
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# backend/app/services/roster.py
+import json
+import zipfile
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+# Sheet header -> student field, in the order the records are emitted
+TRAINEE_COLUMNS = {
+    "FIRST NAME": "first_name",
+    "MIDDLE NAME": "middle_name",
+    "LAST NAME": "last_name",
+    "STRAND": "strand",
+    "DEPARTMENT": "department",
+    "SCHOOL": "school",
+    "BATCH": "batch",
+    "DATE OF IMMERSION": "date_of_immersion",
+    "STATUS": "status",
+}
+DATE_FIELDS = ("date_of_immersion",)
+DATE_FORMAT = "%Y-%m-%d"
+
+
+# ---- public API ----
+def read_trainees(file) -> List[Dict[str, str]]:
+    """Parse a trainee roster into one dict per student.
+
+    Every field is a string: missing columns and empty cells become '',
+    date cells are written as YYYY-MM-DD (free-text dates are kept as
+    typed) and rows with none of the roster columns filled are skipped.
+    """
+    frame = _read_frame(file)
+    return frame.to_dict("records")
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+# ---- internals ----
+def _read_frame(file):
+    import pandas as pd
+
+    if _is_xlsx(file):
+        columns = _read_columns_xlsx(file)
+    else:
+        # .xls and friends: let pandas pick the engine, still only keeping our columns
+        raw = pd.read_excel(getattr(file, "stream", file), dtype=object,
+                            usecols=lambda c: _header(c) in TRAINEE_COLUMNS)
+        columns = {}
+        for name in raw.columns:
+            columns.setdefault(_header(name), raw[name])
+
+    length = max((len(values) for values in columns.values()), default=0)
+    frame = pd.DataFrame({
+        field: pd.Series(columns.get(header, [None] * length), dtype=object)
+        for header, field in TRAINEE_COLUMNS.items()
+    })
+
+    for field in DATE_FIELDS:
+        frame[field] = _format_dates(frame[field])
+    frame = frame.where(frame.notna(), "").astype(str)
+    for field in frame.columns:
+        frame[field] = frame[field].str.strip()
+
+    return frame[(frame != "").any(axis=1)].reset_index(drop=True)
+
+
+def _read_columns_xlsx(file) -> Dict[str, List[Any]]:
+    # Fast path: stream the first sheet with openpyxl's read-only reader and
+    # only keep the roster columns, without building a frame of the whole sheet
+    from openpyxl import load_workbook
+
+    wb = load_workbook(getattr(file, "stream", file), read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        wanted = {}
+        for idx, name in enumerate(header):
+            key = _header(name)
+            if key in TRAINEE_COLUMNS and key not in wanted.values():
+                wanted[idx] = key
+
+        columns = {key: [] for key in wanted.values()}
+        for row in rows:
+            for idx, key in wanted.items():
+                columns[key].append(row[idx] if idx < len(row) else None)
+        return columns
+    finally:
+        wb.close()
+
+
+def _format_dates(column):
+    import pandas as pd
+
+    is_date = column.map(lambda v: isinstance(v, (datetime, date)))
+    if not is_date.any():
+        return column
+    column = column.copy()
+    column[is_date] = pd.to_datetime(column[is_date]).dt.strftime(DATE_FORMAT)
+    return column
+
+
+def _header(name) -> str:
+    return str(name).strip().upper()
+
+
+def _is_xlsx(file) -> bool:
+    stream = getattr(file, "stream", file)
+    try:
+        pos = stream.tell()
+        ok = zipfile.is_zipfile(stream)
+        stream.seek(pos)
+        return ok
+    except (AttributeError, OSError):
+        return False
@@ -0,0 +1,370 @@
+# backend/app/services/storage.py
+import errno
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Absolute, so where the process was started from no longer matters
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", os.path.join(BASE_DIR, "static", "generated"))
+# "local": content-addressed store; "bucket": object-store stand-in (see BucketStore)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+# Unreferenced objects and abandoned temp files older than this are collected
+STORAGE_GC_GRACE_SECONDS = float(os.getenv("STORAGE_GC_GRACE_SECONDS", "3600"))
+# put() runs the collector at most this often
+_GC_EVERY = float(os.getenv("STORAGE_GC_SECONDS", "3600"))
+
+_NAME_RE = re.compile(r"^[^/\\\x00]+$")
+_HASH_CHUNK = 1024 * 1024
+_MAX_SUFFIX = 1000
+
+
+class StorageBackend:
+    """Where generated artifacts live, addressed by a flat file name.
+
+    `put()` has the artifact written to a private temp file, hashes it and
+    only then publishes it under its name, so readers never see a partial
+    file. Without `overwrite`, publishing never replaces another artifact:
+    a taken name gets a ` (2)`, ` (3)`... suffix, which is how two jobs
+    finishing in the same minute keep both outputs, while identical content
+    under the same name is simply the same artifact. Subclasses implement
+    the `_publish`/`_open`/... primitives.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_dir = os.path.join(root, ".tmp")
+        self._last_gc = 0.0
+        self._lock = threading.Lock()
+
+    # ---- public API ----
+    def put(self, name: str, write: Callable[[str], None], overwrite: bool = False) -> str:
+        """Store what `write(tmp_path)` produces as `name`; returns the name it got."""
+        _check_name(name)
+        self._maybe_gc()
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        tmp = os.path.join(self._tmp_dir, f"{uuid.uuid4().hex}{os.path.splitext(name)[1]}")
+        try:
+            write(tmp)
+            return self._publish(tmp, name, _sha256(tmp), overwrite)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def put_bytes(self, name: str, data: bytes, overwrite: bool = False) -> str:
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return self.put(name, write, overwrite=overwrite)
+
+    def open(self, name: str) -> BinaryIO:
+        """Open an artifact for reading; FileNotFoundError if there is none."""
+        _check_name(name)
+        return self._open(name)
+
+    def stat(self, name: str) -> Dict[str, Any]:
+        """`size`, `mtime` and `etag` of an artifact; FileNotFoundError if there is none."""
+        _check_name(name)
+        return self._stat(name)
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.stat(name)
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def delete(self, name: str) -> bool:
+        _check_name(name)
+        return self._delete(name)
+
+    def local_path(self, name: str) -> str | None:
+        """A filesystem path for the artifact, if this backend has one (for sendfile)."""
+        return None
+
+    def names(self) -> List[str]:
+        try:
+            with os.scandir(self.root) as it:
+                return [e.name for e in it if e.is_file() and not e.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+
+    def gc(self, now: float | None = None) -> Dict[str, int]:
+        """Remove abandoned temp files (and, where it applies, unreferenced objects)."""
+        now = time.time() if now is None else now
+        removed = _remove_older(self._tmp_dir, now - STORAGE_GC_GRACE_SECONDS)
+        self._last_gc = time.monotonic()
+        return {"temp_files": removed}
+
+    # ---- internals ----
+    def _publish(self, tmp: str, name: str, digest: str, overwrite: bool) -> str:
+        raise NotImplementedError
+
+    def _open(self, name: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def _stat(self, name: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _delete(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def _maybe_gc(self):
+        if time.monotonic() - self._last_gc < _GC_EVERY:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_gc >= _GC_EVERY:
+                self.gc()
+
+
+class LocalStore(StorageBackend):
+    """Content-addressed store on the local filesystem.
+
+    Each distinct output is kept once, as `.objects/ab/cd/<sha256>` (sharded
+    by the leading hex digits so no directory grows unbounded), and every
+    name is a hard link to its object in the root folder. Identical outputs
+    therefore share their bytes, the root stays a flat, listable folder of
+    names, and an object whose names are all gone (link count 1) is removed
+    by `gc()`. Names are published with link() (fails if taken) or an
+    atomic rename over the old name when overwriting. Linking never touches
+    the object's mtime, so a name reports when its content was first stored.
+    """
+
+    def __init__(self, root: str = STORAGE_ROOT):
+        super().__init__(root)
+        self._objects_dir = os.path.join(root, ".objects")
+
+    def local_path(self, name: str) -> str | None:
+        _check_name(name)
+        path = os.path.join(self.root, name)
+        return path if os.path.isfile(path) else None
+
+    def gc(self, now: float | None = None) -> Dict[str, int]:
+        now = time.time() if now is None else now
+        stats = super().gc(now)
+        unreferenced = 0
+        for dirpath, _, filenames in os.walk(self._objects_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                    # the grace period covers a put() between storing the object and linking its name
+                    if st.st_nlink <= 1 and st.st_mtime < now - STORAGE_GC_GRACE_SECONDS:
+                        os.remove(path)
+                        unreferenced += 1
+                except FileNotFoundError:
+                    continue
+        stats["objects"] = unreferenced
+        return stats
+
+    def _publish(self, tmp: str, name: str, digest: str, overwrite: bool) -> str:
+        obj = os.path.join(self._objects_dir, digest[:2], digest[2:4], digest)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.link(tmp, obj)
+            except FileExistsError:
+                pass  # already stored; its mtime is left alone, older names share the inode
+            try:
+                return self._link_name(obj, name, overwrite)
+            except FileNotFoundError:
+                # gc removed the unreferenced object before a name was linked
+                # to it; store it again from the temp file
+                continue
+        raise OSError(errno.ENOENT, f"Object for {name} kept disappearing")
+
+    def _link_name(self, obj: str, name: str, overwrite: bool) -> str:
+        if overwrite:
+            staged = os.path.join(self._tmp_dir, f"{uuid.uuid4().hex}.link")
+            os.link(obj, staged)
+            os.replace(staged, os.path.join(self.root, name))
+            return name
+
+        obj_ino = os.stat(obj).st_ino
+        for candidate in _candidates(name):
+            path = os.path.join(self.root, candidate)
+            try:
+                os.link(obj, path)
+                return candidate
+            except FileExistsError:
+                if _inode(path) == obj_ino:
+                    return candidate
+        raise OSError(errno.EEXIST, f"No free name for {name}")
+
+    def _open(self, name: str) -> BinaryIO:
+        return open(os.path.join(self.root, name), "rb")
+
+    def _stat(self, name: str) -> Dict[str, Any]:
+        st = os.stat(os.path.join(self.root, name))
+        return {"size": st.st_size, "mtime": st.st_mtime, "etag": f"{st.st_ino:x}-{st.st_size:x}"}
+
+    def _delete(self, name: str) -> bool:
+        try:
+            os.remove(os.path.join(self.root, name))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class BucketStore(StorageBackend):
+    """Stand-in for a MinIO/S3 bucket, kept in a local directory.
+
+    Objects are plain files named by key with their metadata (etag, size,
+    content type) in `.meta/<key>.json`, the way an object store keeps it
+    beside the data. Like a remote bucket it exposes no filesystem path, so
+    downloads go through `open()` and the streamed range handling, and a
+    no-overwrite put behaves like a conditional `If-None-Match: *` PUT.
+    Select it with STORAGE_BACKEND=bucket to exercise that path locally.
+    """
+
+    def __init__(self, root: str = STORAGE_ROOT):
+        super().__init__(root)
+        self._meta_dir = os.path.join(root, ".meta")
+
+    def _publish(self, tmp: str, name: str, digest: str, overwrite: bool) -> str:
+        os.makedirs(self._meta_dir, exist_ok=True)
+        if overwrite:
+            os.replace(tmp, os.path.join(self.root, name))
+            self._write_meta(name, digest)
+            return name
+
+        for candidate in _candidates(name):
+            try:
+                os.link(tmp, os.path.join(self.root, candidate))
+            except FileExistsError:
+                if self._read_meta(candidate).get("etag") == digest:
+                    return candidate
+                continue
+            self._write_meta(candidate, digest)
+            return candidate
+        raise OSError(errno.EEXIST, f"No free name for {name}")
+
+    def _open(self, name: str) -> BinaryIO:
+        return open(os.path.join(self.root, name), "rb")
+
+    def _stat(self, name: str) -> Dict[str, Any]:
+        st = os.stat(os.path.join(self.root, name))
+        meta = self._read_meta(name)
+        return {"size": st.st_size, "mtime": st.st_mtime, "etag": meta.get("etag") or f"{st.st_size:x}"}
+
+    def _delete(self, name: str) -> bool:
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            return False
+        try:
+            os.remove(self._meta_path(name))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _meta_path(self, name: str) -> str:
+        return os.path.join(self._meta_dir, name + ".json")
+
+    def _read_meta(self, name: str) -> Dict[str, Any]:
+        try:
+            with open(self._meta_path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, name: str, digest: str):
+        meta = {
+            "etag": digest,
+            "size": os.path.getsize(os.path.join(self.root, name)),
+            "content_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+        }
+        staged = os.path.join(self._tmp_dir, f"{uuid.uuid4().hex}.json")
+        with open(staged, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(staged, self._meta_path(name))
+
+
+# ---- helpers ----
+def _check_name(name: str):
+    if not name or not _NAME_RE.match(name) or name.startswith("."):
+        raise ValueError(f"Invalid artifact name: {name!r}")
+
+
+def _candidates(name: str):
+    yield name
+    stem, ext = os.path.splitext(name)
+    for n in range(2, _MAX_SUFFIX):
+        yield f"{stem} ({n}){ext}"
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _inode(path: str) -> int | None:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _remove_older(folder: str, cutoff: float) -> int:
+    removed = 0
+    try:
+        entries = list(os.scandir(folder))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+_BACKENDS = {"local": LocalStore, "bucket": BucketStore}
+
+if STORAGE_BACKEND not in _BACKENDS:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r} (expected one of {', '.join(_BACKENDS)})")
+
+storage: StorageBackend = _BACKENDS[STORAGE_BACKEND]()
+
+
+def send_artifact(name: str, download_name: str | None = None, mimetype: str | None = None,
+                  as_attachment: bool = True):
+    """Flask response for an artifact, honouring Range / If-Range / ETag.
+
+    Local files go through send_file(path), which hands the open file to
+    the server's wsgi.file_wrapper (sendfile under gunicorn) or to
+    X-Sendfile when USE_X_SENDFILE is on; other backends are streamed from
+    open() with the same conditional and range handling.
+    """
+    from flask import current_app, request, send_file
+    from werkzeug.wsgi import wrap_file
+
+    download_name = download_name or name
+    path = storage.local_path(name)
+    if path:
+        return send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                         download_name=download_name, conditional=True)
+
+    info = storage.stat(name)
+    response = current_app.response_class(
+        wrap_file(request.environ, storage.open(name)),
+        mimetype=mimetype or mimetypes.guess_type(download_name)[0] or "application/octet-stream",
+        direct_passthrough=True,
+    )
+    response.content_length = info["size"]
+    response.last_modified = info["mtime"]
+    response.set_etag(info["etag"])
+    response.headers.set("Content-Disposition", "attachment" if as_attachment else "inline",
+                         filename=download_name)
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=info["size"])
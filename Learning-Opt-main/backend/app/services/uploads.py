@@ -0,0 +1,153 @@
+# backend/app/services/uploads.py
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+UPLOAD_STORE_DIR = os.getenv("UPLOAD_STORE_DIR", os.path.join(BASE_DIR, "instance", "uploads"))
+# Sessions not written to for this long are removed by the cleaner
+UPLOAD_TTL_SECONDS = float(os.getenv("UPLOAD_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_COMPRESS = os.getenv("UPLOAD_COMPRESS", "0") == "1"
+# The cleaner runs from create() at most this often
+_SWEEP_EVERY = float(os.getenv("UPLOAD_SWEEP_SECONDS", "600"))
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadNotFound(KeyError):
+    """No live upload session with that id."""
+
+
+class UploadStore:
+    """Uploaded row sets, one append-only NDJSON file per upload session.
+
+    Each upload gets its own id and file, so concurrent uploads never touch
+    each other's data and adding rows only writes the new ones, one compact
+    JSON object per line. Batches are written with a single O_APPEND write;
+    compressed sessions append each batch as its own gzip member, which
+    gzip readers see as one stream. Reads are streamed line by line.
+    Sessions expire `ttl` seconds after their last write.
+    """
+
+    def __init__(self, root: str = UPLOAD_STORE_DIR, ttl: float = UPLOAD_TTL_SECONDS,
+                 compress: bool = UPLOAD_COMPRESS):
+        self.root = root
+        self.ttl = ttl
+        self.compress = compress
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    # ---- public API ----
+    def create(self, rows: Iterable[Dict[str, Any]] = ()) -> str:
+        """Start a session (optionally with a first batch) and return its id."""
+        self._maybe_sweep()
+        os.makedirs(self.root, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        ext = ".ndjson.gz" if self.compress else ".ndjson"
+        self._write(os.path.join(self.root, upload_id + ext), rows, create=True)
+        return upload_id
+
+    def append(self, upload_id: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Add rows to an existing session; returns how many were written."""
+        return self._write(self._path(upload_id), rows)
+
+    def iter_rows(self, upload_id: str) -> Iterator[Dict[str, Any]]:
+        path = self._path(upload_id)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def rows(self, upload_id: str) -> List[Dict[str, Any]]:
+        return list(self.iter_rows(upload_id))
+
+    def version(self, upload_id: str) -> tuple:
+        """Changes whenever rows are appended (by any process)."""
+        st = os.stat(self._path(upload_id))
+        return st.st_ino, st.st_size
+
+    def exists(self, upload_id: str) -> bool:
+        try:
+            self._path(upload_id)
+            return True
+        except UploadNotFound:
+            return False
+
+    def info(self, upload_id: str) -> Dict[str, Any]:
+        path = self._path(upload_id)
+        st = os.stat(path)
+        return {
+            "upload_id": upload_id,
+            "rows": sum(1 for _ in self.iter_rows(upload_id)),
+            "bytes": st.st_size,
+            "compressed": path.endswith(".gz"),
+            "expires_at": st.st_mtime + self.ttl,
+        }
+
+    def delete(self, upload_id: str):
+        os.remove(self._path(upload_id))
+
+    def cleanup(self, now: float | None = None) -> int:
+        """Remove sessions idle for longer than the TTL; returns how many went."""
+        now = time.time() if now is None else now
+        removed = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not entry.name.endswith((".ndjson", ".ndjson.gz")):
+                continue
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        self._last_sweep = time.monotonic()
+        return removed
+
+    # ---- internals ----
+    def _path(self, upload_id: str) -> str:
+        if not upload_id or not _ID_RE.match(upload_id):
+            raise UploadNotFound(upload_id)
+        for ext in (".ndjson", ".ndjson.gz"):
+            path = os.path.join(self.root, upload_id + ext)
+            if os.path.exists(path):
+                return path
+        raise UploadNotFound(upload_id)
+
+    def _write(self, path: str, rows: Iterable[Dict[str, Any]], create: bool = False) -> int:
+        lines = [json.dumps(row, ensure_ascii=False, separators=(",", ":"), default=str) for row in rows]
+        data = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        if data and path.endswith(".gz"):
+            data = gzip.compress(data)
+
+        flags = os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        flags |= os.O_CREAT | os.O_EXCL if create else 0
+        fd = os.open(path, flags, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        if not data:
+            os.utime(path)
+        return len(lines)
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep < _SWEEP_EVERY:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_sweep >= _SWEEP_EVERY:
+                self.cleanup()
+
+
+uploads = UploadStore()
@@ -0,0 +1,357 @@
+# backend/app/services/xlsx_stream.py
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+from app.services.excel_filler import PLACEHOLDER_RE, PlaceholderCell, _lookup, _year_context
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_CT = "http://schemas.openxmlformats.org/package/2006/content-types"
+NS_APP = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+RT_WORKSHEET = NS_REL + "/worksheet"
+RT_CALC_CHAIN = NS_REL + "/calcChain"
+# Parts a worksheet may own that are safe to clone once per copy; anything
+# else (tables, comments, pivots) needs unique ids and is left to openpyxl
+CLONEABLE_RELS = {NS_REL + "/drawing", NS_REL + "/printerSettings", NS_REL + "/vmlDrawing"}
+
+# Placeholder markers are private-use characters, which never occur in templates
+_MARK_OPEN, _MARK_CLOSE = "\ue000", "\ue001"
+_MARK_RE = re.compile((_MARK_OPEN + r"(\d+)" + _MARK_CLOSE).encode("utf-8"))
+# Control characters are not allowed in XML (openpyxl rejects them too)
+_ILLEGAL_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class UnsupportedTemplate(Exception):
+    """The template uses features the streaming writer cannot copy faithfully."""
+
+
+class StreamingSheetTemplate:
+    """A template workbook prepared for write-only, one-sheet-at-a-time output.
+
+    The template worksheet's XML is serialised once with every placeholder cell
+    turned into an inline string and then split around those cells, so each
+    trainee sheet is written straight into the output archive as
+    `segment, value, segment, ...` bytes. All other package parts (styles,
+    shared strings, theme, images) are copied through unchanged, which keeps
+    styles, merged cells, column widths and drawings exactly as in the
+    template while memory stays at one sheet no matter how large the cohort.
+    """
+
+    def __init__(self, path: str, sheet: str = "first"):
+        self.path = path
+        with zipfile.ZipFile(path) as zf:
+            self.names = zf.namelist()
+            workbook_part = _workbook_part(zf)
+            self.workbook_part = workbook_part
+            self.workbook = etree.fromstring(zf.read(workbook_part))
+            self.workbook_rels = etree.fromstring(zf.read(_rels_name(workbook_part)))
+            self.content_types = etree.fromstring(zf.read("[Content_Types].xml"))
+            shared_strings = self._shared_strings(zf)
+
+            sheets = self.workbook.findall(f"{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet")
+            if not sheets:
+                raise UnsupportedTemplate("Template has no worksheets.")
+            self.sheet_index = _active_tab(self.workbook) if sheet == "active" else 0
+            self.sheet_el = sheets[self.sheet_index]
+            rid = self.sheet_el.get(f"{{{NS_REL}}}id")
+            self.sheet_part = _resolve(workbook_part, self._rel_target(self.workbook_rels, rid))
+
+            # parts owned by the template sheet, cloned for every copy
+            self.owned: List[Tuple[str, str, bytes | None]] = []
+            self.sheet_rels = None
+            if _rels_name(self.sheet_part) in self.names:
+                self.sheet_rels = etree.fromstring(zf.read(_rels_name(self.sheet_part)))
+                for rel in self.sheet_rels:
+                    if rel.get("TargetMode") == "External":
+                        continue
+                    if rel.get("Type") not in CLONEABLE_RELS:
+                        raise UnsupportedTemplate(f"Worksheet relationship {rel.get('Type')} is not supported.")
+                    part = _resolve(self.sheet_part, rel.get("Target"))
+                    rels_name = _rels_name(part)
+                    self.owned.append((rel.get("Id"), part, zf.read(rels_name) if rels_name in self.names else None))
+
+            self.cells, self.segments = self._compile_sheet(etree.fromstring(zf.read(self.sheet_part)), shared_strings)
+
+    # ---- public API ----
+    def write(self, out, entries: Iterable[Tuple[str, Dict[str, Any]]], mapping: Dict[str, Any] | None = None,
+              progress: Callable[[int], None] | None = None) -> int:
+        """Write a workbook with one filled template copy per `(title, rowdict)` entry.
+
+        `out` is a path or a writable binary file. The template sheet itself is
+        dropped and the copies are appended after any other template sheets,
+        matching what the openpyxl-based generators produce. Returns the
+        number of sheets written.
+        """
+        mapping = mapping or {}
+        taken = set(self.names) - {self.sheet_part, _rels_name(self.sheet_part)}
+        taken -= {p for _, p, _ in self.owned} | {_rels_name(p) for _, p, _ in self.owned}
+        calc_chain = [r for r in self.workbook_rels if r.get("Type") == RT_CALC_CHAIN]
+        skip = set(self.names) - taken
+        # calcChain refers to sheets by id; Excel rebuilds it when it is missing
+        skip |= {_resolve(self.workbook_part, r.get("Target")) for r in calc_chain}
+
+        added: List[Tuple[str, str, str]] = []  # (sheet part, rId, title)
+        cloned: List[Tuple[str, str]] = []  # (new part, template part)
+        count = 0
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            with zipfile.ZipFile(self.path) as src:
+                for name in self.names:
+                    if name in skip or name in ("[Content_Types].xml", self.workbook_part,
+                                                _rels_name(self.workbook_part), "docProps/app.xml"):
+                        continue
+                    zf.writestr(src.getinfo(name), src.read(name))
+
+                owned_blobs = {part: src.read(part) for _, part, _ in self.owned}
+
+            for title, rowdict in entries:
+                count += 1
+                sheet_part = _free_name(taken, "xl/worksheets/sheet%d.xml")
+                rel_map = {}
+                for rid, part, part_rels in self.owned:
+                    new_part = _free_name(taken, _numbered_pattern(part))
+                    zf.writestr(new_part, owned_blobs[part])
+                    if part_rels is not None:
+                        zf.writestr(_rels_name(new_part), part_rels)
+                    cloned.append((new_part, part))
+                    rel_map[rid] = _relative(sheet_part, new_part)
+
+                zf.writestr(sheet_part, self._render_sheet(mapping, rowdict, selected=count == 1))
+                if self.sheet_rels is not None:
+                    zf.writestr(_rels_name(sheet_part), self._sheet_rels_xml(rel_map))
+                added.append((sheet_part, f"rIdSheet{count}", title))
+                if progress:
+                    progress(count)
+
+            zf.writestr("[Content_Types].xml", self._content_types_xml(skip, added, cloned))
+            zf.writestr(self.workbook_part, self._workbook_xml(added))
+            zf.writestr(_rels_name(self.workbook_part), self._workbook_rels_xml(added, calc_chain))
+            if "docProps/app.xml" in self.names:
+                zf.writestr("docProps/app.xml", self._app_xml())
+        return count
+
+    # ---- template compilation ----
+    def _shared_strings(self, zf) -> List[str]:
+        rel = next((r for r in self.workbook_rels if r.get("Type") == NS_REL + "/sharedStrings"), None)
+        if rel is None:
+            return []
+        root = etree.fromstring(zf.read(_resolve(self.workbook_part, rel.get("Target"))))
+        return ["".join(si.xpath("./m:t/text()|./m:r/m:t/text()", namespaces={"m": NS_MAIN}))
+                for si in root.findall(f"{{{NS_MAIN}}}si")]
+
+    def _compile_sheet(self, root, shared_strings: List[str]):
+        cells: List[PlaceholderCell] = []
+        for c in root.iter(f"{{{NS_MAIN}}}c"):
+            text = _cell_text(c, shared_strings)
+            if not (text and "{" in text and "}" in text):
+                continue
+            parts = PLACEHOLDER_RE.split(text)
+            if len(parts) == 1:
+                continue
+            row, column = _split_ref(c.get("r"))
+            for child in list(c):
+                c.remove(child)
+            c.set("t", "inlineStr")
+            is_el = etree.SubElement(c, f"{{{NS_MAIN}}}is")
+            t = etree.SubElement(is_el, f"{{{NS_MAIN}}}t")
+            t.set(XML_SPACE, "preserve")
+            t.text = f"{_MARK_OPEN}{len(cells)}{_MARK_CLOSE}"
+            cells.append(PlaceholderCell(row, column, parts, _year_context(text)))
+
+        # only the first copy is the selected tab, otherwise Excel opens the
+        # workbook with every sheet grouped
+        for view in root.iter(f"{{{NS_MAIN}}}sheetView"):
+            view.attrib.pop("tabSelected", None)
+
+        blob = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        segments = _MARK_RE.split(blob)[::2]
+        return cells, segments
+
+    def _render_sheet(self, mapping, rowdict, selected: bool) -> bytes:
+        out = [self.segments[0].replace(b"<sheetView ", b'<sheetView tabSelected="1" ', 1)
+               if selected else self.segments[0]]
+        for pc, segment in zip(self.cells, self.segments[1:]):
+            text = [pc.parts[0]]
+            for i in range(1, len(pc.parts), 2):
+                text.append(_lookup(pc.parts[i], pc.context, mapping, rowdict))
+                text.append(pc.parts[i + 1])
+            out.append(escape(_ILLEGAL_XML_RE.sub("", "".join(text))).encode("utf-8"))
+            out.append(segment)
+        return b"".join(out)
+
+    def _rel_target(self, rels, rid: str) -> str:
+        for rel in rels:
+            if rel.get("Id") == rid:
+                return rel.get("Target")
+        raise UnsupportedTemplate(f"Relationship {rid} not found.")
+
+    # ---- package bookkeeping ----
+    def _sheet_rels_xml(self, rel_map: Dict[str, str]) -> bytes:
+        root = etree.fromstring(etree.tostring(self.sheet_rels))
+        for rel in root:
+            if rel.get("Id") in rel_map:
+                rel.set("Target", rel_map[rel.get("Id")])
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    def _content_types_xml(self, skip, added, cloned) -> bytes:
+        root = etree.fromstring(etree.tostring(self.content_types))
+        overrides = {}
+        for el in root.findall(f"{{{NS_CT}}}Override"):
+            part = el.get("PartName").lstrip("/")
+            overrides[part] = el.get("ContentType")
+            if part in skip:
+                root.remove(el)
+        sheet_type = overrides[self.sheet_part]
+        for sheet_part, _, _ in added:
+            etree.SubElement(root, f"{{{NS_CT}}}Override", PartName="/" + sheet_part, ContentType=sheet_type)
+        for new_part, part in cloned:
+            if part in overrides:
+                etree.SubElement(root, f"{{{NS_CT}}}Override", PartName="/" + new_part, ContentType=overrides[part])
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    def _workbook_xml(self, added) -> bytes:
+        root = etree.fromstring(etree.tostring(self.workbook))
+        sheets_el = root.find(f"{{{NS_MAIN}}}sheets")
+        sheet_els = sheets_el.findall(f"{{{NS_MAIN}}}sheet")
+        next_id = max(int(s.get("sheetId")) for s in sheet_els) + 1
+        sheets_el.remove(sheets_el[self.sheet_index])
+        kept = len(sheet_els) - 1
+        for i, (_, rid, title) in enumerate(added):
+            el = etree.SubElement(sheets_el, f"{{{NS_MAIN}}}sheet", name=title, sheetId=str(next_id + i))
+            el.set(f"{{{NS_REL}}}id", rid)
+
+        for view in root.iter(f"{{{NS_MAIN}}}workbookView"):
+            view.set("activeTab", str(kept))
+            view.attrib.pop("firstSheet", None)
+
+        # names scoped to the template sheet go with it; later sheets shift down
+        defined = root.find(f"{{{NS_MAIN}}}definedNames")
+        if defined is not None:
+            for dn in list(defined):
+                local = dn.get("localSheetId")
+                if local is None:
+                    continue
+                if int(local) == self.sheet_index:
+                    defined.remove(dn)
+                elif int(local) > self.sheet_index:
+                    dn.set("localSheetId", str(int(local) - 1))
+            if not len(defined):
+                root.remove(defined)
+
+        calc = root.find(f"{{{NS_MAIN}}}calcPr")
+        if calc is not None:
+            calc.set("fullCalcOnLoad", "1")
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    def _workbook_rels_xml(self, added, calc_chain) -> bytes:
+        root = etree.fromstring(etree.tostring(self.workbook_rels))
+        dropped = {self.sheet_el.get(f"{{{NS_REL}}}id")} | {r.get("Id") for r in calc_chain}
+        for rel in list(root):
+            if rel.get("Id") in dropped:
+                root.remove(rel)
+        for sheet_part, rid, _ in added:
+            etree.SubElement(root, f"{{{NS_PKG_REL}}}Relationship", Id=rid, Type=RT_WORKSHEET,
+                             Target=_relative(self.workbook_part, sheet_part))
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    def _app_xml(self) -> bytes:
+        # The sheet title list is optional and Excel rewrites it on save;
+        # dropping it is cheaper than keeping it in sync
+        with zipfile.ZipFile(self.path) as zf:
+            root = etree.fromstring(zf.read("docProps/app.xml"))
+        for tag in ("HeadingPairs", "TitlesOfParts"):
+            el = root.find(f"{{{NS_APP}}}{tag}")
+            if el is not None:
+                root.remove(el)
+        return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+# Compiled templates per file, keyed by (path, sheet) and revalidated by mtime/size
+_templates: Dict[Tuple[str, str], Tuple[int, int, StreamingSheetTemplate]] = {}
+_templates_lock = threading.Lock()
+
+
+def get_streaming_template(path: str, sheet: str = "first") -> StreamingSheetTemplate:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    with _templates_lock:
+        cached = _templates.get((path, sheet))
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+    template = StreamingSheetTemplate(path, sheet)
+    with _templates_lock:
+        _templates[(path, sheet)] = (st.st_mtime_ns, st.st_size, template)
+    return template
+
+
+# ---- helpers ----
+def _workbook_part(zf) -> str:
+    root = etree.fromstring(zf.read("_rels/.rels"))
+    for rel in root:
+        if rel.get("Type") == NS_REL + "/officeDocument":
+            return rel.get("Target").lstrip("/")
+    raise UnsupportedTemplate("Template has no workbook part.")
+
+
+def _active_tab(workbook) -> int:
+    view = workbook.find(f"{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView")
+    return int(view.get("activeTab", "0")) if view is not None else 0
+
+
+def _rels_name(part: str) -> str:
+    head, tail = posixpath.split(part)
+    return posixpath.join(head, "_rels", tail + ".rels")
+
+
+def _resolve(source_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _relative(source_part: str, target_part: str) -> str:
+    return posixpath.relpath(target_part, posixpath.dirname(source_part))
+
+
+def _numbered_pattern(part: str) -> str:
+    # xl/drawings/drawing1.xml -> xl/drawings/drawing%d.xml
+    head, tail = posixpath.split(part)
+    stem, ext = posixpath.splitext(tail)
+    return posixpath.join(head, re.sub(r"\d+$", "", stem).replace("%", "%%") + "%d" + ext)
+
+
+def _free_name(taken: set, pattern: str) -> str:
+    n = 1
+    while pattern % n in taken:
+        n += 1
+    name = pattern % n
+    taken.add(name)
+    return name
+
+
+def _cell_text(c, shared_strings: List[str]) -> str | None:
+    kind = c.get("t")
+    if kind == "s":
+        v = c.find(f"{{{NS_MAIN}}}v")
+        if v is not None and v.text is not None:
+            return shared_strings[int(v.text)]
+    elif kind == "inlineStr":
+        return "".join(c.xpath("./m:is/m:t/text()|./m:is/m:r/m:t/text()", namespaces={"m": NS_MAIN}))
+    return None
+
+
+def _split_ref(ref: str) -> Tuple[int, int]:
+    m = re.match(r"([A-Z]+)(\d+)", ref)
+    column = 0
+    for ch in m.group(1):
+        column = column * 26 + ord(ch) - 64
+    return int(m.group(2)), column
@@ -0,0 +1,154 @@
+# backend/app/startup.py
+"""Cold-start helpers.
+
+Routes import pandas, python-pptx, openpyxl, requests and mysql.connector
+on first use, so `create_app()` stays cheap for the dev server and for
+respawned workers. A preloading WSGI master calls `preload()` instead, so
+the forked workers share those libraries copy-on-write.
+
+The import-time report runs the app factory in a fresh interpreter under
+`-X importtime` and breaks the cost down per module:
+
+    python -m app.startup              # lazy startup (the default)
+    python -m app.startup --eager      # startup with preload()
+    python -m app.startup --json --budget-ms 800   # for CI: fails over budget
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Libraries the request paths need but the app factory doesn't
+HEAVY_MODULES = (
+    "pandas",
+    "openpyxl",
+    "pptx",
+    "mysql.connector.pooling",
+    "requests",
+)
+
+_FACTORY_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+if {eager!r}:
+    from app.startup import preload
+    preload()
+sys.stdout.write(json.dumps({{"ready_ms": (time.perf_counter() - started) * 1000}}))
+"""
+
+
+# ---- public API ----
+def preload(templates: bool = True):
+    """Import the heavy libraries (and compile the certificate templates) now."""
+    for name in HEAVY_MODULES:
+        try:
+            # __import__ rather than importlib so -X importtime reports it
+            __import__(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {e}")
+
+    if templates:
+        from app.services.pptx_templates import get_template
+
+        for path in glob.glob(os.path.join(BASE_DIR, "uploads", "templates", "*.pptx")):
+            try:
+                get_template(path)
+            except Exception as e:
+                logger.warning(f"Could not preload template {path}: {e}")
+
+
+def import_report(eager: bool = False, top: int = 20) -> Dict[str, Any]:
+    """Time `create_app()` in a fresh interpreter and break its imports down.
+
+    `packages` is the import time spent in each top-level package's own
+    modules (these add up to `import_ms`, which also counts the interpreter's
+    own startup imports); `app_modules` is the cumulative time of each of our
+    modules, i.e. including whatever it pulled in.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _FACTORY_SNIPPET.format(eager=eager)],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"App factory failed:\n{proc.stderr[-2000:]}")
+
+    entries = _parse_importtime(proc.stderr)
+    packages: Dict[str, float] = {}
+    for name, self_us, _ in entries:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0.0) + self_us / 1000
+
+    app_modules = {}
+    for name, _, cumulative_us in entries:
+        if name == "app" or name.startswith("app."):
+            app_modules[name] = max(app_modules.get(name, 0.0), cumulative_us / 1000)
+
+    heavy = [m for m in HEAVY_MODULES if any(name == m for name, _, _ in entries)]
+    return {
+        "mode": "eager" if eager else "lazy",
+        "ready_ms": round(json.loads(proc.stdout.strip().splitlines()[-1])["ready_ms"], 1),
+        "import_ms": round(sum(packages.values()), 1),
+        "modules_imported": len(entries),
+        "heavy_modules_loaded": heavy,
+        "packages": _top(packages, top),
+        "app_modules": _top(app_modules, top),
+    }
+
+
+# ---- helpers ----
+def _parse_importtime(stderr: str) -> List[tuple]:
+    # "import time:  self [us] | cumulative | imported package"
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        entries.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return entries
+
+
+def _top(times: Dict[str, float], n: int) -> List[Dict[str, Any]]:
+    ranked = sorted(times.items(), key=lambda kv: kv[1], reverse=True)[:n]
+    return [{"module": name, "ms": round(ms, 1)} for name, ms in ranked]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the backend's startup")
+    parser.add_argument("--eager", action="store_true", help="include preload() as a preloading WSGI master does")
+    parser.add_argument("--top", type=int, default=20, help="modules to list per section")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--budget-ms", type=float, help="exit non-zero if startup takes longer than this")
+    args = parser.parse_args(argv)
+
+    report = import_report(eager=args.eager, top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Startup ({report['mode']}): ready in {report['ready_ms']} ms, "
+              f"{report['import_ms']} ms importing {report['modules_imported']} modules")
+        print(f"Heavy libraries loaded: {', '.join(report['heavy_modules_loaded']) or 'none'}")
+        for section in ("packages", "app_modules"):
+            print(f"\n{section}:")
+            for row in report[section]:
+                print(f"  {row['ms']:>9.1f} ms  {row['module']}")
+
+    if args.budget_ms is not None and report["ready_ms"] > args.budget_ms:
+        print(f"Startup took {report['ready_ms']} ms, over the {args.budget_ms:g} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# backend/gunicorn.conf.py
+# Production server settings; every value can be overridden from the environment.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Graceful reload: `kill -HUP <master pid>` starts fresh workers and lets the
+# old ones finish their in-flight requests. Because the app is preloaded in
+# the master, picking up new code needs a full restart (or USR2 + QUIT).
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.getenv("GUNICORN_BIND", f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}")
+
+# Generation is CPU bound (certificate decks also fan out to their own
+# process pool), so one worker per core; threads cover the I/O-bound routes
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+# Import the app and preload its libraries and templates once in the master
+preload_app = True
+
+# Synchronous generation requests can legitimately run for minutes; long
+# batches should use the async job API (?async=1) instead
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "120"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers now and then to bound memory growth from large renders
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def post_fork(server, worker):
+    # Connections opened while the app was preloading belong to the master
+    from app.services import db
+
+    db.pool.reset()
@@ -0,0 +1,17 @@
+# backend/wsgi.py
+"""WSGI entry point: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+With preload enabled the app is imported once in the gunicorn master, so
+the heavy libraries and the compiled certificate templates are loaded
+here and shared copy-on-write by every forked worker instead of being
+loaded per worker on first use. Set WSGI_PRELOAD=0 to keep them lazy.
+"""
+import os
+
+from app import create_app
+from app.startup import preload
+
+app = create_app()
+
+if os.getenv("WSGI_PRELOAD", "1") == "1":
+    preload()
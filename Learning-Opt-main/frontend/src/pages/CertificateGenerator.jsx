@@ -16,9 +16,12 @@ function CertificateGenerator() {
   const [excelData, setExcelData] = useState([]);
   const [previewLoading, setPreviewLoading] = useState(false);
   const [generatedFiles, setGeneratedFiles] = useState([]);
+  // Server-side copy of the uploaded rows; generate/preview send its id instead of the rows
+  const [datasetId, setDatasetId] = useState(null);
 
   const handleExcelParsed = async (data) => {
     setExcelData(data);
+    setDatasetId(null);
     try {
       const response = await fetch("http://localhost:5000/upload/excel", {
         method: "POST",
@@ -27,6 +30,7 @@ function CertificateGenerator() {
       });
       if (!response.ok) throw new Error("Upload failed");
       const result = await response.json();
+      setDatasetId(result.dataset_id || null);
       console.log("Upload success:", result);
     } catch (error) {
       console.error("Error uploading excel data:", error);
@@ -35,6 +39,9 @@ function CertificateGenerator() {
 
   const detectedColumns = excelData.length > 0 ? Object.keys(excelData[0]) : [];
 
+  const rowsPayload = () =>
+    datasetId ? { dataset_id: datasetId } : { rows: excelData };
+
   const handleGenerate = async () => {
     if (excelData.length === 0) {
       alert("No data loaded. Please upload an Excel file first.");
@@ -48,7 +55,7 @@ function CertificateGenerator() {
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({
             template: selectedTemplate,
-            rows: excelData,
+            ...rowsPayload(),
           }),
         }
       );
@@ -70,7 +77,7 @@ function CertificateGenerator() {
       const response = await fetch("http://localhost:5000/generate/preview", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ template: selectedTemplate, rows: excelData }),
+        body: JSON.stringify({ template: selectedTemplate, ...rowsPayload() }),
       });
       const html = await response.text();
       const previewWindow = window.open("", "_blank");
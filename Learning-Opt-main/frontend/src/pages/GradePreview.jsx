@@ -23,6 +23,7 @@ function GradePreview() {
   // Generated Files state (from GeneratedFiles component)
   const [generatedFiles, setGeneratedFiles] = useState([]);
   const [loadingFiles, setLoadingFiles] = useState(true);
+  const [filesCursor, setFilesCursor] = useState(null);
   const [selectedFile, setSelectedFile] = useState(null);
   const [selectedFileStudents, setSelectedFileStudents] = useState([]);
   const [isEditingHistory, setIsEditingHistory] = useState(false);
@@ -322,15 +323,20 @@ function GradePreview() {
   };
 
   // Generated Files API functions
-  const fetchGeneratedFiles = async () => {
+  // Fetched a page at a time; passing the previous page's cursor appends the next page
+  const fetchGeneratedFiles = async (cursor = null) => {
     setLoadingFiles(true);
     try {
-      const response = await fetch(`${API_BASE}/api/generated-files`);
+      const query = `?limit=50${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`;
+      const response = await fetch(`${API_BASE}/api/generated-files${query}`);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
       const data = await response.json();
-      setGeneratedFiles(data.files || []);
+      setGeneratedFiles((prev) =>
+        cursor ? [...prev, ...(data.files || [])] : data.files || []
+      );
+      setFilesCursor(data.next_cursor || null);
     } catch (error) {
       console.error("Error fetching files:", error);
       alert("Failed to fetch files: " + error.message);
@@ -528,7 +534,7 @@ function GradePreview() {
 
             <div className="mb-4">
               <button
-                onClick={fetchGeneratedFiles}
+                onClick={() => fetchGeneratedFiles()}
                 className="px-4 py-2 bg-gradient-to-r from-purple-600 to-purple-700 hover:from-purple-700 hover:to-purple-800 rounded-lg transition-all duration-300 font-semibold text-white shadow-lg text-sm"
                 disabled={loadingFiles}
               >
@@ -596,6 +602,18 @@ function GradePreview() {
                 ))
               )}
             </div>
+
+            {filesCursor && (
+              <div className="mt-4 flex justify-center">
+                <button
+                  onClick={() => fetchGeneratedFiles(filesCursor)}
+                  className="px-4 py-2 bg-gradient-to-r from-purple-600 to-purple-700 hover:from-purple-700 hover:to-purple-800 rounded-lg transition-all duration-300 font-semibold text-white shadow-lg text-sm"
+                  disabled={loadingFiles}
+                >
+                  {loadingFiles ? "🔄 Loading..." : "⬇️ Load More"}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       )}
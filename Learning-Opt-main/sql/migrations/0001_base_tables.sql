@@ -0,0 +1,71 @@
+--
+-- 0001: the tables behind the grades history
+--
+-- These used to be created by hand; IF NOT EXISTS keeps this a no-op on
+-- databases that already have them.
+--
+
+CREATE TABLE IF NOT EXISTS `generated_files` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `filename` varchar(255) NOT NULL,
+  `original_filename` varchar(255) DEFAULT NULL,
+  `file_type` varchar(50) NOT NULL DEFAULT 'grades',
+  `batch` varchar(100) DEFAULT NULL,
+  `school` varchar(255) DEFAULT NULL,
+  `date_of_immersion` date DEFAULT NULL,
+  `total_students` int(11) NOT NULL DEFAULT 0,
+  `file_path` varchar(500) DEFAULT NULL,
+  `file_size` bigint(20) DEFAULT NULL,
+  `status` varchar(20) NOT NULL DEFAULT 'active',
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE IF NOT EXISTS `generated_file_students` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `file_id` int(11) NOT NULL,
+  `last_name` varchar(100) DEFAULT NULL,
+  `first_name` varchar(100) DEFAULT NULL,
+  `middle_name` varchar(100) DEFAULT NULL,
+  `strand` varchar(100) DEFAULT NULL,
+  `department` varchar(100) DEFAULT NULL,
+  `school` varchar(255) DEFAULT NULL,
+  `batch` varchar(100) DEFAULT NULL,
+  `date_of_immersion` date DEFAULT NULL,
+  `over_all` decimal(6,2) DEFAULT NULL,
+  `WI` decimal(6,2) DEFAULT NULL,
+  `CO` decimal(6,2) DEFAULT NULL,
+  `5S` decimal(6,2) DEFAULT NULL,
+  `BO` decimal(6,2) DEFAULT NULL,
+  `CBO` decimal(6,2) DEFAULT NULL,
+  `SDG` decimal(6,2) DEFAULT NULL,
+  `OHSA` decimal(6,2) DEFAULT NULL,
+  `WE` decimal(6,2) DEFAULT NULL,
+  `UJC` decimal(6,2) DEFAULT NULL,
+  `ISO` decimal(6,2) DEFAULT NULL,
+  `PO` decimal(6,2) DEFAULT NULL,
+  `HR` decimal(6,2) DEFAULT NULL,
+  `DS` decimal(6,2) DEFAULT NULL,
+  `WI2` decimal(6,2) DEFAULT NULL,
+  `ELEX` decimal(6,2) DEFAULT NULL,
+  `CM` decimal(6,2) DEFAULT NULL,
+  `SPC` decimal(6,2) DEFAULT NULL,
+  `PROD` decimal(6,2) DEFAULT NULL,
+  `PerDev` decimal(6,2) DEFAULT NULL,
+  `Supp` decimal(6,2) DEFAULT NULL,
+  `AppDev` decimal(6,2) DEFAULT NULL,
+  `Tech` decimal(6,2) DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE IF NOT EXISTS `file_operations_log` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `file_id` int(11) DEFAULT NULL,
+  `operation_type` varchar(50) NOT NULL,
+  `operation_details` text DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
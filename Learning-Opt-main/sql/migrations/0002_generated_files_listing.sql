@@ -0,0 +1,36 @@
+--
+-- 0002: listing support for `generated_files` (GET /api/generated-files)
+--
+-- student_count / average_performance are kept up to date by the backend
+-- whenever a file's students are inserted or updated, so the listing no
+-- longer joins and groups generated_file_students. The composite indexes
+-- match the keyset order (created_at DESC, id DESC) for each filter.
+-- One change per statement, so re-running over a hand-patched table only
+-- skips what is already there.
+--
+
+ALTER TABLE `generated_files`
+  ADD COLUMN `student_count` int(11) NOT NULL DEFAULT 0;
+ALTER TABLE `generated_files`
+  ADD COLUMN `average_performance` decimal(6,2) DEFAULT NULL;
+
+-- Backfill the denormalised columns from the existing student rows
+UPDATE `generated_files` gf
+  LEFT JOIN (
+    SELECT `file_id`, COUNT(*) AS n, AVG(`over_all`) AS avg_over_all
+    FROM `generated_file_students`
+    GROUP BY `file_id`
+  ) s ON s.`file_id` = gf.`id`
+SET gf.`student_count` = COALESCE(s.n, 0),
+    gf.`average_performance` = s.avg_over_all;
+
+ALTER TABLE `generated_files`
+  ADD INDEX `idx_gf_status_created` (`status`, `created_at`, `id`);
+ALTER TABLE `generated_files`
+  ADD INDEX `idx_gf_status_batch_created` (`status`, `batch`, `created_at`, `id`);
+ALTER TABLE `generated_files`
+  ADD INDEX `idx_gf_status_school_created` (`status`, `school`, `created_at`, `id`);
+
+-- The per-file recount and the cleanup deletes look students up by file
+ALTER TABLE `generated_file_students`
+  ADD INDEX `idx_gfs_file` (`file_id`);
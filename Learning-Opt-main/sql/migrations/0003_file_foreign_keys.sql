@@ -0,0 +1,20 @@
+--
+-- 0003: students belong to their file
+--
+-- Deleting a generated_files row now takes its students with it, so the
+-- backend no longer deletes them first. file_operations_log is an audit
+-- trail that outlives the files it mentions (hard deletes are logged before
+-- the row goes), so it only gets an index, not a foreign key.
+--
+
+-- Student rows left behind by earlier partial deletes would block the key
+DELETE gfs FROM `generated_file_students` gfs
+  LEFT JOIN `generated_files` gf ON gf.`id` = gfs.`file_id`
+WHERE gf.`id` IS NULL;
+
+ALTER TABLE `generated_file_students`
+  ADD CONSTRAINT `fk_gfs_file` FOREIGN KEY (`file_id`)
+    REFERENCES `generated_files` (`id`) ON DELETE CASCADE;
+
+ALTER TABLE `file_operations_log`
+  ADD INDEX `idx_fol_file` (`file_id`, `created_at`);